@@ -1,42 +1,785 @@
 # A simple program to perform a mathematical operation on two numbers.
+#
+# It can also be imported as an expression engine: compile_expression() parses
+# a whole arithmetic expression (like "price * (1 - rate / 100)") once, and the
+# compiled result can then be evaluated quickly for many different inputs.
 
-# Use a try-except block to handle potential errors, such as non-numeric input.
-try:
-    # Get the first number from the user and convert it to a floating-point number.
-    num1 = float(input("Please enter the first number: "))
-    
-    # Get the second number from the user and convert it to a floating-point number.
-    num2 = float(input("Please enter the second number: "))
-    
-    # Get the mathematical operator from the user.
-    operator = input("Please enter an operator (+, -, *, /): ")
+import os
+import ast
+import sys
+import json
+import math
+import stat
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from functools import lru_cache
 
-    # Initialize a variable to store the result.
-    result = 0.0
+# The operators supported by the simple two-number calculator.
+OPERATORS = ['+', '-', '*', '/']
 
+# Settings for the calculator service (see CalculatorService)
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "simple_calculator.sock")
+DEFAULT_CACHE_SIZE = 10_000
+READ_SIZE = 64 * 1024  # Bytes read from a connection at a time
+MAX_LINE_BYTES = 64 * 1024  # Longer request lines close the connection
+CLIENT_BATCH_LINES = 1000  # Requests a client sends before reading the answers
+STATS_COMMAND = "stats"
+
+
+def calculate(num1, operator, num2):
+    """
+    Performs one mathematical operation on two numbers.
+
+    Args:
+        num1 (float): The first number.
+        operator (str): One of '+', '-', '*' or '/'.
+        num2 (float): The second number.
+
+    Returns:
+        float: The result.
+
+    Raises:
+        ZeroDivisionError: If dividing by zero.
+        ValueError: If the operator is not recognized.
+    """
     # Use an if-elif-else statement to perform the correct operation.
     if operator == '+':
-        result = num1 + num2
+        return num1 + num2
     elif operator == '-':
-        result = num1 - num2
+        return num1 - num2
     elif operator == '*':
-        result = num1 * num2
+        return num1 * num2
     elif operator == '/':
         # Handle the edge case of division by zero.
         if num2 == 0:
-            print("Error: Cannot divide by zero.")
-            # Exit the program or break out of the conditional logic.
-            exit()
-        result = num1 / num2
+            raise ZeroDivisionError("Cannot divide by zero.")
+        return num1 / num2
     else:
-        # If the operator is not recognized, print an error message.
-        print("Error: Invalid operator entered.")
-        # Exit the program or break out of the conditional logic.
-        exit()
+        raise ValueError("Invalid operator entered.")
+
+
+# ============================================================================
+# Expression engine
+# ============================================================================
+
+class ExpressionError(ValueError):
+    """Raised when an expression can't be parsed or evaluated."""
+
+
+# The only kinds of syntax an expression may contain. Anything else (function
+# calls, attribute access, comparisons...) is rejected, so evaluating an
+# expression can never run arbitrary code.
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub,
+)
+
+# Operators whose result may be undefined: a zero divisor, or a power of a
+# negative number (which Python would turn into a complex number). They are
+# compiled into calls of these helper functions, so each evaluation mode can
+# decide what an undefined result means.
+OPERATOR_HELPERS = {ast.Div: '_divide', ast.FloorDiv: '_floor_divide', ast.Mod: '_modulo',
+                    ast.Pow: '_power'}
+
+
+class _OperatorRewriter(ast.NodeTransformer):
+    """Turns divisions and powers into helper calls and every number into a float."""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        helper = OPERATOR_HELPERS.get(type(node.op))
+        if helper is None:
+            return node
+        call = ast.Call(func=ast.Name(id=helper, ctx=ast.Load()),
+                        args=[node.left, node.right], keywords=[])
+        return ast.copy_location(call, node)
+
+    def visit_Constant(self, node):
+        # Like the calculator, work with floats. This also keeps '**' from
+        # building huge integers: a float power overflows instead. Variable
+        # values are converted when they are bound (see CompiledExpression).
+        return ast.copy_location(ast.Constant(value=float(node.value)), node)
+
+
+def _checked_division(function):
+    """
+    Wraps a scalar division so a zero divisor always raises ZeroDivisionError,
+    also for NumPy numbers (which would return inf or NaN instead).
+    """
+    def divide(left, right):
+        if right == 0:
+            raise ZeroDivisionError("Cannot divide by zero.")
+        return function(left, right)
+    return divide
+
+
+def _real_power(left, right):
+    """
+    Raises `left` to the power `right`, giving NaN where Python would return a
+    complex number (e.g. (-8) ** 0.5), just as NumPy does.
+    """
+    result = left ** right
+    return math.nan if isinstance(result, complex) else result
+
+
+def _numpy_power(left, right):
+    """Raises to a power element-wise. A complex result gives NaN for that element."""
+    import numpy as np
+
+    return np.power(np.asarray(left, dtype=np.float64), right)
+
+
+def _numpy_division(function_name):
+    """Wraps a NumPy division ufunc so a zero divisor gives NaN for that element only."""
+    def divide(left, right):
+        import numpy as np
+
+        left, right = np.broadcast_arrays(np.asarray(left, dtype=np.float64),
+                                          np.asarray(right, dtype=np.float64))
+        result = np.full(left.shape, np.nan)
+        with np.errstate(all='ignore'):
+            getattr(np, function_name)(left, right, out=result, where=right != 0)
+        return result
+    return divide
+
+
+class CompiledExpression:
+    """
+    An arithmetic expression that has been parsed and compiled once.
+
+    Supports + - * / // % **, unary minus, parentheses, numbers and variable
+    names. Variables get their values when the expression is evaluated.
+    """
+
+    # Helpers for evaluating one set of values: a zero divisor raises.
+    _SCALAR_GLOBALS = {
+        '__builtins__': {},
+        '_divide': _checked_division(lambda left, right: left / right),
+        '_floor_divide': _checked_division(lambda left, right: left // right),
+        '_modulo': _checked_division(lambda left, right: left % right),
+        '_power': _real_power,
+    }
+    # Helpers for NumPy arrays: a zero divisor gives NaN in that position.
+    _ARRAY_GLOBALS = {
+        '__builtins__': {},
+        '_divide': _numpy_division('divide'),
+        '_floor_divide': _numpy_division('floor_divide'),
+        '_modulo': _numpy_division('mod'),
+        '_power': _numpy_power,
+    }
+
+    def __init__(self, source):
+        """
+        Parses, checks and compiles an expression.
+
+        Args:
+            source (str): The expression, e.g. "(a + b) / 2".
+
+        Raises:
+            ExpressionError: If the expression is not valid arithmetic.
+        """
+        self.source = source
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ExpressionError(f"Invalid expression '{source}': {e.msg}.") from None
+
+        names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise ExpressionError(
+                    f"Invalid expression '{source}': {type(node).__name__} is not allowed.")
+            if isinstance(node, ast.Constant) and (
+                    isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+                raise ExpressionError(f"Invalid expression '{source}': only numbers are allowed.")
+            if isinstance(node, ast.Name):
+                if node.id.startswith('_'):
+                    raise ExpressionError(
+                        f"Invalid expression '{source}': names can't start with '_'.")
+                names.add(node.id)
+
+        # The variables the expression needs, in alphabetical order
+        self.variables = tuple(sorted(names))
+        tree = ast.fix_missing_locations(_OperatorRewriter().visit(tree))
+        self._code = compile(tree, '<expression>', 'eval')
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+    def _run(self, global_names, values):
+        try:
+            return eval(self._code, global_names, values)
+        except NameError as e:
+            raise ExpressionError(f"Missing value for {e.name!r} in '{self.source}'.") from None
+
+    def _float_values(self, values):
+        # Integer values would otherwise bring back integer arithmetic
+        try:
+            return {name: float(value) for name, value in values.items()}
+        except (TypeError, ValueError):
+            raise ExpressionError(f"Values for '{self.source}' must be numbers.") from None
+
+    def evaluate(self, **values):
+        """
+        Evaluates the expression for one set of values.
+
+        Args:
+            **values: A number for each variable.
+
+        Returns:
+            float: The result. NaN if it is undefined in the real numbers,
+                   e.g. for (-8) ** 0.5, as in evaluate_arrays.
+
+        Raises:
+            ZeroDivisionError: If the expression divides by zero.
+            OverflowError: If a result is too large.
+            ExpressionError: If a variable has no value, or a value is not a number.
+        """
+        return self._run(self._SCALAR_GLOBALS, self._float_values(values))
+
+    def evaluate_many(self, rows):
+        """
+        Evaluates the expression once per row of values.
+
+        A row that divides by zero or overflows gives NaN for that row; the
+        other rows are not affected.
+
+        Args:
+            rows (iterable): Dicts mapping variable names to numbers.
+
+        Returns:
+            list: One float result per row.
+        """
+        results = []
+        for row in rows:
+            try:
+                results.append(self._run(self._SCALAR_GLOBALS, self._float_values(row)))
+            except (ZeroDivisionError, OverflowError):
+                results.append(math.nan)
+        return results
+
+    def evaluate_arrays(self, **arrays):
+        """
+        Evaluates the expression element-wise over NumPy arrays.
+
+        The whole calculation runs as a handful of vectorized NumPy operations.
+        Division by zero gives NaN only in the affected positions, and an
+        overflow gives inf (as usual for NumPy).
+
+        Args:
+            **arrays: An array (or a single number, broadcast to all
+                      elements) for each variable.
+
+        Returns:
+            numpy.ndarray: The results.
+        """
+        import numpy as np
+
+        values = {name: np.asarray(value, dtype=np.float64) for name, value in arrays.items()}
+        with np.errstate(over='ignore', invalid='ignore'):
+            return np.asarray(self._run(self._ARRAY_GLOBALS, values), dtype=np.float64)
+
+
+@lru_cache(maxsize=256)
+def compile_expression(source):
+    """
+    Returns the CompiledExpression for a source string.
+
+    Recently compiled expressions are cached, so calling this again with the
+    same formula doesn't parse it again.
+    """
+    return CompiledExpression(source)
+
+
+# ============================================================================
+# Calculator service
+#
+# A long-running server that answers "num1 op num2" requests over a local
+# socket, so a calculation doesn't pay for starting a new Python interpreter.
+# Each request is one line; the answer is one line too: the result, or
+# "error: <message>". A client may send many lines at once (a batch) and read
+# the answers in the same order. The line "stats" returns the counters as JSON.
+# ============================================================================
+
+class CalculatorService:
+    """Answers calculator requests, with an LRU cache and performance counters."""
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            cache_size (int): The number of recent answers to keep.
+        """
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.started_at = time.perf_counter()
+        self.counters = {
+            'connections': 0,
+            'batches': 0,
+            'requests': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'errors': 0,
+            'busy_seconds': 0.0,
+            'max_batch_seconds': 0.0,
+        }
+
+    def answer(self, line):
+        """
+        Answers one request line, using the cache when possible.
+
+        Args:
+            line (str): A request such as "3 * 4".
+
+        Returns:
+            str: The result, or "error: <message>".
+        """
+        cached = self._cache.get(line)
+        if cached is not None:
+            self._cache.move_to_end(line)
+            self.counters['cache_hits'] += 1
+            answer = cached
+        else:
+            self.counters['cache_misses'] += 1
+            answer = self.compute(line)
+            # Errors are cached too: the same line always gets the same answer
+            self._cache[line] = answer
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        if answer.startswith("error:"):
+            self.counters['errors'] += 1
+        return answer
+
+    @staticmethod
+    def compute(line):
+        """Calculates the answer to one request line, without the cache."""
+        try:
+            num1, operator, num2 = line.split()
+            num1, num2 = float(num1), float(num2)
+        except ValueError:
+            return "error: Invalid input. Expected 'num1 op num2'."
+        try:
+            return repr(calculate(num1, operator, num2))
+        except (ZeroDivisionError, ValueError) as e:
+            return f"error: {e}"
+
+    def answer_batch(self, lines):
+        """
+        Answers a batch of request lines and updates the counters.
+
+        Returns:
+            list: One answer line per request line.
+        """
+        start = time.perf_counter()
+        answers = []
+        for line in lines:
+            line = line.strip()
+            if line == STATS_COMMAND:
+                answers.append(json.dumps(self.stats()))
+            else:
+                answers.append(self.answer(line))
+        elapsed = time.perf_counter() - start
+        self.counters['batches'] += 1
+        self.counters['requests'] += len(lines)
+        self.counters['busy_seconds'] += elapsed
+        self.counters['max_batch_seconds'] = max(self.counters['max_batch_seconds'], elapsed)
+        return answers
+
+    def stats(self):
+        """
+        Returns the counters, plus throughput and latency figures.
+
+        `mean_latency_us` is the average time spent answering one request;
+        `requests_per_second` is measured over the whole uptime.
+        """
+        stats = dict(self.counters)
+        uptime = time.perf_counter() - self.started_at
+        lookups = stats['cache_hits'] + stats['cache_misses']
+        stats['uptime_seconds'] = uptime
+        stats['cache_entries'] = len(self._cache)
+        stats['cache_hit_rate'] = stats['cache_hits'] / lookups if lookups else 0.0
+        stats['requests_per_second'] = stats['requests'] / uptime if uptime > 0 else 0.0
+        stats['mean_latency_us'] = (stats['busy_seconds'] / stats['requests'] * 1e6
+                                    if stats['requests'] else 0.0)
+        return stats
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves one client connection until it closes.
+
+        A request line longer than MAX_LINE_BYTES gets an error answer and
+        the connection is closed, so a client can't make the service buffer
+        an endless line.
+        """
+        self.counters['connections'] += 1
+        pending = bytearray()  # The start of a line whose end hasn't arrived yet
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                end = data.rfind(b"\n")
+                if end < 0:
+                    # No complete line yet: append (amortized), don't copy the buffer
+                    pending += data
+                else:
+                    # Answer every complete line received so far in one batch,
+                    # and send all the answers back with a single write
+                    pending += data[:end]
+                    lines = pending.split(b"\n")
+                    pending = bytearray(data[end + 1:])
+                    answers = self.answer_batch([line.decode('utf-8', 'replace') for line in lines])
+                    writer.write(("\n".join(answers) + "\n").encode('utf-8'))
+                    await writer.drain()
+                if len(pending) > MAX_LINE_BYTES:
+                    self.counters['errors'] += 1
+                    writer.write(f"error: Request line longer than {MAX_LINE_BYTES} bytes.\n".encode('utf-8'))
+                    await writer.drain()
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path=DEFAULT_SOCKET_PATH, port=None, host='127.0.0.1'):
+        """
+        Runs the service until it is cancelled.
+
+        Args:
+            path (str): The Unix socket to listen on, when no port is given.
+            port (int, optional): Listen on this localhost TCP port instead.
+            host (str): The address to bind when listening on TCP.
+
+        Raises:
+            OSError: If `path` exists but is not a stale socket.
+        """
+        if port is not None:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            print(f"Calculator service listening on {host}:{port}")
+        else:
+            remove_stale_socket(path)
+            server = await asyncio.start_unix_server(self.handle_connection, path)
+            print(f"Calculator service listening on {path}")
+        async with server:
+            await server.serve_forever()
+
+
+def remove_stale_socket(path):
+    """
+    Removes a Unix socket file left over from an earlier run.
+
+    Raises:
+        FileExistsError: If `path` is not a socket, or a service still answers on it.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket.")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)  # Nobody is listening any more
+            return
+    raise FileExistsError(f"A service is already listening on {path}.")
+
+
+class CalculatorClient:
+    """A small blocking client for the calculator service."""
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, port=None, host='127.0.0.1', timeout=10):
+        """
+        Connects to the service.
+
+        Args:
+            path (str): The service's Unix socket, when no port is given.
+            port (int, optional): The service's TCP port on `host` instead.
+            host (str): The service's host when using TCP.
+            timeout (float): Seconds to wait for the service.
+        """
+        if port is not None:
+            self._socket = socket.create_connection((host, port), timeout=timeout)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(path)
+        self._file = self._socket.makefile('rwb')
+
+    def send_lines(self, lines):
+        """
+        Sends request lines and returns the answer lines, in the same order.
+
+        Big batches are sent in parts of CLIENT_BATCH_LINES, reading the
+        answers in between, so neither side can block on a full socket buffer.
+        """
+        answers = []
+        for start in range(0, len(lines), CLIENT_BATCH_LINES):
+            part = lines[start:start + CLIENT_BATCH_LINES]
+            self._file.write(("\n".join(part) + "\n").encode('utf-8'))
+            self._file.flush()
+            for _ in part:
+                answer = self._file.readline()
+                if not answer:
+                    raise ConnectionError("The calculator service closed the connection.")
+                answers.append(answer.decode('utf-8').rstrip("\n"))
+        return answers
+
+    def calculate_many(self, requests):
+        """
+        Calculates a batch of (num1, operator, num2) requests.
+
+        Returns:
+            list: One float per request; NaN where the service answered with
+                  an error (such as division by zero).
+        """
+        answers = self.send_lines([f"{num1!r} {operator} {num2!r}" for num1, operator, num2 in requests])
+        return [math.nan if answer.startswith("error:") else float(answer) for answer in answers]
+
+    def calculate(self, num1, operator, num2):
+        """
+        Calculates one request.
+
+        Raises:
+            ZeroDivisionError: If dividing by zero.
+            ValueError: For any other error reported by the service.
+        """
+        answer = self.send_lines([f"{num1!r} {operator} {num2!r}"])[0]
+        if answer == "error: Cannot divide by zero.":
+            raise ZeroDivisionError("Cannot divide by zero.")
+        if answer.startswith("error:"):
+            raise ValueError(answer[len("error: "):])
+        return float(answer)
+
+    def stats(self):
+        """Returns the service's counters."""
+        return json.loads(self.send_lines([STATS_COMMAND])[0])
+
+    def close(self):
+        """Closes the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def benchmark_service(total_requests=200_000, batch_size=1000, clients=4, distinct_operands=100,
+                      cache_size=DEFAULT_CACHE_SIZE):
+    """
+    Load-tests the calculator service and compares it with starting a new
+    interpreter for each calculation.
+
+    The service runs in a separate process on a temporary Unix socket. The
+    client threads send batches of random requests; the operands are drawn
+    from a small pool so that the cache gets repeat requests, as in real use.
+
+    Args:
+        total_requests (int): The number of requests sent across all clients.
+        batch_size (int): The number of requests per batch.
+        clients (int): The number of concurrent client connections.
+        distinct_operands (int): The size of the operand pool.
+        cache_size (int): The service's cache size.
+
+    Returns:
+        dict: Client-side throughput and batch latency percentiles, the
+              service's own counters, and the per-process startup cost.
+    """
+    if total_requests < 1:
+        raise ValueError("The benchmark needs at least one request.")
+    # Every client sends at least one request
+    clients = max(1, min(clients, total_requests))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "calculator.sock")
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", "--socket", path,
+             "--cache-size", str(cache_size)], stdout=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while not os.path.exists(path):
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("The calculator service did not start.")
+                time.sleep(0.01)
+
+            batch_latencies = []
+            lock = threading.Lock()
+
+            def run_client(requests_to_send, seed):
+                generator = random.Random(seed)
+                with CalculatorClient(path) as client:
+                    sent = 0
+                    while sent < requests_to_send:
+                        count = min(batch_size, requests_to_send - sent)
+                        batch = [(float(generator.randrange(distinct_operands)),
+                                  generator.choice(OPERATORS),
+                                  float(generator.randrange(distinct_operands)))
+                                 for _ in range(count)]
+                        start = time.perf_counter()
+                        client.calculate_many(batch)
+                        elapsed = time.perf_counter() - start
+                        with lock:
+                            batch_latencies.append(elapsed)
+                        sent += count
+
+            threads = [threading.Thread(target=run_client,
+                                        args=(total_requests // clients, seed))
+                       for seed in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            with CalculatorClient(path) as client:
+                service_stats = client.stats()
+        finally:
+            server.terminate()
+            server.wait()
+
+    # For comparison: the cost of one calculation in a fresh interpreter
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--expr", "1 + 2"],
+                   stdout=subprocess.DEVNULL, check=True)
+    process_seconds = time.perf_counter() - start
+
+    batch_latencies.sort()
+    sent = (total_requests // clients) * clients
+    results = {
+        'requests': sent,
+        'seconds': elapsed,
+        'requests_per_second': sent / elapsed,
+        'batch_p50_ms': batch_latencies[len(batch_latencies) // 2] * 1000,
+        'batch_p99_ms': batch_latencies[min(len(batch_latencies) - 1,
+                                            int(len(batch_latencies) * 0.99))] * 1000,
+        'service': service_stats,
+        'process_per_calculation_ms': process_seconds * 1000,
+    }
+    print(f"Sent {sent:,} requests in batches of {batch_size} from {clients} clients:")
+    print(f"  Throughput:        {results['requests_per_second']:,.0f} requests/s")
+    print(f"  Batch latency:     p50 {results['batch_p50_ms']:.2f} ms, "
+          f"p99 {results['batch_p99_ms']:.2f} ms")
+    print(f"  Service latency:   {service_stats['mean_latency_us']:.2f} µs per request")
+    print(f"  Cache hit rate:    {service_stats['cache_hit_rate']:.1%}")
+    print(f"  New process per calculation: {results['process_per_calculation_ms']:.1f} ms")
+    return results
+
+
+# ============================================================================
+# Command line
+# ============================================================================
+
+def parse_args(argv=None):
+    """Parses the command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Simple calculator. Without options, asks for two numbers and an operator.")
+    parser.add_argument("--expr", metavar="EXPRESSION",
+                        help='evaluate an expression, e.g. "(a + b) / 2"')
+    parser.add_argument("--var", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="values for a variable in --expr; give several to evaluate many at once")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the calculator service until interrupted")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, metavar="PATH",
+                        help=f"Unix socket for the service (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--port", type=int,
+                        help="serve on this localhost TCP port instead of a Unix socket")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"number of answers the service caches (default: {DEFAULT_CACHE_SIZE})")
+    parser.add_argument("--benchmark-service", type=int, metavar="REQUESTS",
+                        help="load-test the service with REQUESTS requests and exit")
+    return parser.parse_args(argv)
+
+
+def run_expression(source, var_options):
+    """
+    Evaluates --expr for the values given with --var and prints the results.
+
+    Raises:
+        ValueError: If a value is not a number, or the variables have
+                    different numbers of values (one value is used for all rows).
+    """
+    values = {}
+    for option in var_options:
+        name, _, numbers = option.partition('=')
+        values[name.strip()] = [float(number) for number in numbers.split(',')]
+
+    expression = compile_expression(source)
+    count = max((len(numbers) for numbers in values.values()), default=1)
+    for name, numbers in values.items():
+        if len(numbers) not in (1, count):
+            raise ValueError(f"--var {name} has {len(numbers)} values, but another variable has {count}.")
+    rows = [{name: numbers[i] if len(numbers) > 1 else numbers[0]
+             for name, numbers in values.items()} for i in range(count)]
+    for row, result in zip(rows, expression.evaluate_many(rows)):
+        inputs = ", ".join(f"{name}={value}" for name, value in row.items())
+        if math.isnan(result):
+            # Division by zero, an overflow, or e.g. the square root of a negative number
+            print(f"{source} [{inputs}] = Error: Undefined result.")
+        else:
+            print(f"{source} [{inputs}] = {result}" if inputs else f"{source} = {result}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.serve:
+        try:
+            asyncio.run(CalculatorService(args.cache_size).serve(args.socket, args.port))
+        except KeyboardInterrupt:
+            print("\nCalculator service stopped.")
+        except OSError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        sys.exit()
+    if args.benchmark_service is not None:
+        benchmark_service(args.benchmark_service, cache_size=args.cache_size)
+        sys.exit()
+    if args.expr:
+        try:
+            run_expression(args.expr, args.var)
+        except ValueError as e:
+            # ExpressionError, or a --var value that is not a number
+            print(f"Error: {e}")
+            sys.exit(1)
+        sys.exit()
+
+    # Use a try-except block to handle potential errors, such as non-numeric input.
+    try:
+        # Get the first number from the user and convert it to a floating-point number.
+        num1 = float(input("Please enter the first number: "))
+
+        # Get the second number from the user and convert it to a floating-point number.
+        num2 = float(input("Please enter the second number: "))
+
+        # Get the mathematical operator from the user.
+        operator = input("Please enter an operator (+, -, *, /): ")
+
+        # Perform the correct operation.
+        try:
+            result = calculate(num1, operator, num2)
+        except ZeroDivisionError:
+            print("Error: Cannot divide by zero.")
+            # Exit the program.
+            sys.exit()
+        except ValueError:
+            # If the operator is not recognized, print an error message.
+            print("Error: Invalid operator entered.")
+            # Exit the program.
+            sys.exit()
 
-    # Print the final result 
-    print(f"{num1} {operator} {num2} = {result}")
+        # Print the final result
+        print(f"{num1} {operator} {num2} = {result}")
 
-except ValueError:
-    # This block will execute if the user enters non-numeric input.
-    print("Error: Invalid input. Please enter valid numbers.")
+    except ValueError:
+        # This block will execute if the user enters non-numeric input.
+        print("Error: Invalid input. Please enter valid numbers.")
@@ -1,14 +1,39 @@
+import os
+import sys
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+from eventBus import emit
+
 # ============================================================================
 # Part 1: The Parent Class (Superclass)
 #
 # This class defines the basic structure that all our animal classes will share.
 # It has an initializer (__init__) and a 'move' method that child classes
 # are expected to override.
+#
+# The classes use __slots__, so an instance stores its attributes in fixed
+# slots instead of a per-object __dict__. This makes every animal several
+# times smaller, which matters when simulating millions of them.
+#
+# move() reports through eventBus.emit(): the message is printed right away,
+# unless an event bus has been installed with eventBus.set_event_bus().
 # ============================================================================
 
 class Animal:
     """A base class for all animals."""
 
+    __slots__ = ('name',)
+
+    # How move() describes the animal; '{}' is replaced by its name
+    MOVE_FORMAT = "{} moves in a generic way."
+
+    # How far the animal moves in one simulation tick
+    SPEED = 1.0
+
     def __init__(self, name):
         """
         Constructor for the Animal class.
@@ -24,7 +49,7 @@ class Animal:
         This method is intended to be overridden by subclasses. If a subclass
         forgets to implement it, this message will be shown.
         """
-        print(f"{self.name} moves in a generic way.")
+        emit('animal.move', self.MOVE_FORMAT.format(self.name), name=self.name, species=type(self).__name__)
 
 
 # ============================================================================
@@ -38,36 +63,446 @@ class Animal:
 class Bird(Animal):
     """Represents a bird that flies."""
 
+    __slots__ = ()
+
+    MOVE_FORMAT = "{} the bird is Flying 🐦..."
+    SPEED = 12.0
+
     def move(self):
         """Overrides the parent move() method to describe flying."""
-        print(f"{self.name} the bird is Flying 🐦...")
+        emit('animal.move', self.MOVE_FORMAT.format(self.name), name=self.name, species=type(self).__name__)
 
 
 class Fish(Animal):
     """Represents a fish that swims."""
 
+    __slots__ = ()
+
+    MOVE_FORMAT = "{} the fish is Swimming 🐠..."
+    SPEED = 3.0
+
     def move(self):
         """Overrides the parent move() method to describe swimming."""
-        print(f"{self.name} the fish is Swimming 🐠...")
+        emit('animal.move', self.MOVE_FORMAT.format(self.name), name=self.name, species=type(self).__name__)
 
 
 class Lion(Animal):
     """Represents a lion that runs."""
 
+    __slots__ = ()
+
+    MOVE_FORMAT = "{} the lion is Running 🦁..."
+    SPEED = 8.0
+
     def move(self):
         """Overrides the parent move() method to describe running."""
-        print(f"{self.name} the lion is Running 🦁...")
+        emit('animal.move', self.MOVE_FORMAT.format(self.name), name=self.name, species=type(self).__name__)
+
+
+# ============================================================================
+# Part 3: Populations (Struct of Arrays)
+#
+# A Population stores many animals as a few arrays instead of one object each:
+# an array of names and an array of one-byte species codes. Behavior is
+# dispatched once per species over all of its animals, rather than once per
+# animal, and the output is written in large buffered blocks.
+# ============================================================================
+
+# The species code of a class is its position in this tuple
+SPECIES_CLASSES = (Animal, Bird, Fish, Lion)
+SPECIES_CODES = {animal_class: code for code, animal_class in enumerate(SPECIES_CLASSES)}
+
+# The number of move() lines joined into each write
+MOVE_BATCH_SIZE = 65_536
+
+
+class Population:
+    """A large group of animals, stored column-wise."""
+
+    __slots__ = ('names', 'species')
+
+    def __init__(self, names=(), species=()):
+        """
+        Constructor for the Population class.
+
+        Args:
+            names (sequence): The name of each animal.
+            species (sequence): The species code of each animal (see SPECIES_CLASSES).
+        """
+        import numpy as np
+
+        self.names = np.array(names, dtype=object)
+        self.species = np.array(species, dtype=np.uint8)
+        if self.names.shape != self.species.shape:
+            raise ValueError("names and species must have the same length.")
+
+    @classmethod
+    def from_animals(cls, animals):
+        """Creates a population from Animal objects."""
+        animals = list(animals)
+        return cls([animal.name for animal in animals],
+                   [SPECIES_CODES[type(animal)] for animal in animals])
+
+    def __len__(self):
+        return len(self.species)
+
+    def __getitem__(self, index):
+        """Returns the animal at `index` as an Animal object."""
+        return SPECIES_CLASSES[self.species[index]](self.names[index])
+
+    def extend(self, names, animal_class):
+        """Adds animals of one species."""
+        import numpy as np
+
+        names = np.array(names, dtype=object)
+        self.names = np.concatenate([self.names, names])
+        self.species = np.concatenate([self.species,
+                                       np.full(len(names), SPECIES_CODES[animal_class], dtype=np.uint8)])
+
+    def counts(self):
+        """Returns the number of animals of each species class."""
+        import numpy as np
+
+        counts = np.bincount(self.species, minlength=len(SPECIES_CLASSES))
+        return {animal_class: int(count) for animal_class, count in zip(SPECIES_CLASSES, counts)}
+
+    def move_all(self, stream=None):
+        """
+        Writes what move() prints for every animal, one pass per species.
+
+        The lines are the same as calling move() on each animal, but grouped
+        by species instead of in population order.
+
+        Args:
+            stream (file, optional): Where to write the lines (default: sys.stdout).
+
+        Returns:
+            int: The number of lines written.
+        """
+        stream = sys.stdout if stream is None else stream
+        for code, animal_class in enumerate(SPECIES_CLASSES):
+            names = self.names[self.species == code]
+            prefix, suffix = animal_class.MOVE_FORMAT.split('{}')
+            separator = suffix + '\n' + prefix
+            for start in range(0, len(names), MOVE_BATCH_SIZE):
+                # Written in parts: concatenating would copy the joined block again
+                stream.write(prefix)
+                stream.write(separator.join(names[start:start + MOVE_BATCH_SIZE]))
+                stream.write(suffix + '\n')
+        return len(self)
+
+
+def benchmark_population(count=1_000_000):
+    """
+    Compares calling move() on each of `count` animal objects against
+    Population.move_all, and checks both write the same lines.
+
+    Args:
+        count (int): The number of generated animals.
+
+    Returns:
+        dict: The elapsed seconds of both approaches and the speedup.
+    """
+    import io
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    species = rng.integers(1, len(SPECIES_CLASSES), count)
+    names = [f"Animal{number}" for number in range(count)]
+    animals = [SPECIES_CLASSES[code](name) for name, code in zip(names, species.tolist())]
+    population = Population(names, species)
+
+    # Both approaches must describe the same moves
+    sample = min(count, 10_000)
+    loop_output = io.StringIO()
+    with contextlib.redirect_stdout(loop_output):
+        for animal in animals[:sample]:
+            animal.move()
+    bulk_output = io.StringIO()
+    Population(names[:sample], species[:sample]).move_all(bulk_output)
+    if sorted(loop_output.getvalue().splitlines()) != sorted(bulk_output.getvalue().splitlines()):
+        raise AssertionError("Population.move_all does not match Animal.move")
+
+    with open(os.devnull, 'w', encoding='utf-8') as sink:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sink):
+            for animal in animals:
+                animal.move()
+        loop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        population.move_all(sink)
+        bulk_seconds = time.perf_counter() - start
+
+    # Memory per animal, not counting the name strings both approaches share
+    object_bytes = sys.getsizeof(animals[0]) + 8  # The object plus its pointer in the list
+    column_bytes = (population.names.nbytes + population.species.nbytes) / count
+
+    print(f"Moving {count:,} animals:")
+    print(f"  Per-object loop: {loop_seconds:.3f}s ({count / loop_seconds:,.0f} animals/s)")
+    print(f"  Population:      {bulk_seconds:.3f}s ({count / bulk_seconds:,.0f} animals/s)")
+    print(f"  Speedup:         {loop_seconds / bulk_seconds:.1f}x")
+    print(f"  Memory per animal: {object_bytes} bytes as objects, {column_bytes:.0f} bytes as columns")
+    return {'loop_seconds': loop_seconds, 'bulk_seconds': bulk_seconds,
+            'speedup': loop_seconds / bulk_seconds}
 
 
 # ============================================================================
-# Part 3: Demonstrating Polymorphism
+# Part 4: Simulation
+#
+# A TickScheduler advances a population over many ticks. On each tick every
+# animal turns a little and moves forward at the speed of its species.
+# The state lives in shared memory, and each worker process updates its
+# own slice of it in place. A tick only sends the workers a few integers,
+# never the arrays.
+# ============================================================================
+
+# The per-animal state arrays, stored as rows of one shared float64 block
+STATE_FIELDS = ('x', 'y', 'heading', 'phase', 'speed')
+
+# Animals start at random positions in a square of this size
+WORLD_SIZE = 10_000.0
+
+# How sharply and how often the animals turn
+TURN_RATE = 0.2
+TURN_FREQUENCY = 0.1
+
+# The state arrays of a worker process, attached in init_simulation_worker
+_worker_state = {}
+
+
+def state_arrays(buffer, count):
+    """Returns the STATE_FIELDS arrays of `count` animals stored in `buffer`."""
+    import numpy as np
+
+    block = np.ndarray((len(STATE_FIELDS), count), dtype=np.float64, buffer=buffer)
+    return dict(zip(STATE_FIELDS, block))
+
+
+def advance_animals(state, start, stop, tick, dt):
+    """
+    Moves the animals in [start, stop) by one tick, in place.
+
+    The turn depends only on the animal and the tick, so the results are
+    the same however the population is split between workers.
+    """
+    import numpy as np
+
+    heading = state['heading'][start:stop]
+    heading += TURN_RATE * np.sin(state['phase'][start:stop] + tick * TURN_FREQUENCY)
+    distance = state['speed'][start:stop] * dt
+    state['x'][start:stop] += distance * np.cos(heading)
+    state['y'][start:stop] += distance * np.sin(heading)
+
+
+def init_simulation_worker(memory_name, count):
+    """Attaches a worker process to the shared simulation state."""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_state['memory'] = memory  # Keeps the mapping open
+    _worker_state['arrays'] = state_arrays(memory.buf, count)
+
+
+def advance_partition(start, stop, tick, dt):
+    """Moves one slice of the population by one tick. Runs in a worker process."""
+    started = time.perf_counter()
+    advance_animals(_worker_state['arrays'], start, stop, tick, dt)
+    return time.perf_counter() - started
+
+
+class TickScheduler:
+    """
+    Advances a Population tick by tick, split across worker processes.
+
+    The latency of every tick is kept in `latencies`.
+
+    Example:
+        with TickScheduler(population, workers=4) as scheduler:
+            scheduler.run(100)
+            print(scheduler.latency_summary())
+    """
+
+    def __init__(self, population, workers=None, seed=0):
+        """
+        Constructor for the TickScheduler class.
+
+        Args:
+            population (Population): The animals to simulate.
+            workers (int, optional): The number of worker processes (default:
+                one per CPU). With 1, ticks run in this process.
+            seed (int): Seeds the random starting positions and headings.
+        """
+        import numpy as np
+
+        self.count = len(population)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, self.count or 1))
+        self.tick = 0
+        self.latencies = []
+
+        self._memory = shared_memory.SharedMemory(create=True,
+                                                  size=max(1, len(STATE_FIELDS) * self.count * 8))
+        self.state = state_arrays(self._memory.buf, self.count)
+        rng = np.random.default_rng(seed)
+        self.state['x'][:] = rng.uniform(0, WORLD_SIZE, self.count)
+        self.state['y'][:] = rng.uniform(0, WORLD_SIZE, self.count)
+        self.state['heading'][:] = rng.uniform(0, 2 * np.pi, self.count)
+        self.state['phase'][:] = rng.uniform(0, 2 * np.pi, self.count)
+        speeds = np.array([animal_class.SPEED for animal_class in SPECIES_CLASSES])
+        self.state['speed'][:] = speeds[population.species]
+
+        # Contiguous, nearly equal slices; one per worker
+        bounds = np.linspace(0, self.count, self.workers + 1).astype(int)
+        self.partitions = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=init_simulation_worker,
+                                                 initargs=(self._memory.name, self.count))
+
+    def step(self, dt=1.0):
+        """Advances every animal by one tick and returns how long it took, in seconds."""
+        started = time.perf_counter()
+        if self._executor is None:
+            advance_animals(self.state, 0, self.count, self.tick, dt)
+        else:
+            futures = [self._executor.submit(advance_partition, start, stop, self.tick, dt)
+                       for start, stop in self.partitions]
+            wait(futures)
+            for future in futures:
+                future.result()  # Raises a worker's exception, if any
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        self.tick += 1
+        return latency
+
+    def run(self, ticks, dt=1.0):
+        """Advances the simulation by `ticks` ticks and returns their latencies."""
+        return [self.step(dt) for _ in range(ticks)]
+
+    def positions(self):
+        """Returns a copy of the (x, y) positions, as two arrays."""
+        return self.state['x'].copy(), self.state['y'].copy()
+
+    def latency_summary(self):
+        """Returns the mean, median, 95th percentile and maximum tick latency, in milliseconds."""
+        import numpy as np
+
+        if not self.latencies:
+            return {}
+        latencies = np.array(self.latencies) * 1000
+        return {'ticks': len(latencies), 'mean_ms': float(latencies.mean()),
+                'p50_ms': float(np.percentile(latencies, 50)),
+                'p95_ms': float(np.percentile(latencies, 95)), 'max_ms': float(latencies.max())}
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._memory is not None:
+            self.state = None  # Release the views before closing the mapping
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def random_population(count, seed=0):
+    """Creates a population of `count` birds, fish and lions."""
+    import numpy as np
+
+    species = np.random.default_rng(seed).integers(1, len(SPECIES_CLASSES), count)
+    return Population([f"Animal{number}" for number in range(count)], species)
+
+
+def benchmark_scheduler(count=1_000_000, ticks=50, worker_counts=None):
+    """
+    Runs the same simulation with different numbers of workers and reports
+    the tick latencies and the speedup over a single process. Also checks
+    that every run ends with the same positions.
+
+    Args:
+        count (int): The number of animals.
+        ticks (int): The number of ticks per run.
+        worker_counts (list, optional): The worker counts to try (default:
+            1, 2, 4, ... up to the number of CPUs).
+
+    Returns:
+        dict: The latency summary of each worker count.
+    """
+    import numpy as np
+
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({min(2 ** power, cpus) for power in range(cpus.bit_length() + 1)})
+
+    population = random_population(count)
+    results = {}
+    reference = None
+    print(f"Simulating {count:,} animals for {ticks} ticks ({os.cpu_count()} CPUs):")
+    for workers in worker_counts:
+        with TickScheduler(population, workers) as scheduler:
+            scheduler.step()  # Warm-up: starts the workers
+            scheduler.latencies.clear()
+            scheduler.run(ticks)
+            summary = scheduler.latency_summary()
+            positions = scheduler.positions()
+        if reference is None:
+            reference = positions
+        elif not all(np.array_equal(a, b) for a, b in zip(reference, positions)):
+            raise AssertionError(f"{workers} workers ended with different positions")
+        results[workers] = summary
+
+        speedup = results[worker_counts[0]]['mean_ms'] / summary['mean_ms']
+        print(f"  {workers:>3} workers: mean {summary['mean_ms']:.2f} ms, p50 {summary['p50_ms']:.2f} ms, "
+              f"p95 {summary['p95_ms']:.2f} ms, max {summary['max_ms']:.2f} ms per tick "
+              f"({count / summary['mean_ms'] * 1000:,.0f} animals/s, {speedup:.2f}x)")
+    return results
+
+
+# ============================================================================
+# Part 5: Demonstrating Polymorphism
 #
 # Here, we create objects of different classes and treat them as if they
 # are the same type (Animal). We can call the same method, move(), on each
 # one, and Python executes the correct version for that object's class.
 # ============================================================================
 
+def parse_args(argv=None):
+    """Parses the command-line options."""
+    parser = argparse.ArgumentParser(description="Demonstrate polymorphism with animals.")
+    parser.add_argument("--benchmark", type=int, metavar="COUNT",
+                        help="compare per-object and population moves of COUNT animals and exit")
+    parser.add_argument("--simulate", type=int, metavar="COUNT",
+                        help="simulate COUNT animals, report the tick latencies and exit")
+    parser.add_argument("--scaling", type=int, metavar="COUNT",
+                        help="compare simulations of COUNT animals across worker counts and exit")
+    parser.add_argument("--ticks", type=int, default=100,
+                        help="with --simulate or --scaling, the number of ticks (default: 100)")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="with --simulate, the number of worker processes (default: number of CPUs)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.benchmark:
+        benchmark_population(args.benchmark)
+        sys.exit(0)
+    if args.scaling:
+        benchmark_scheduler(args.scaling, args.ticks)
+        sys.exit(0)
+    if args.simulate:
+        with TickScheduler(random_population(args.simulate), args.workers) as scheduler:
+            scheduler.run(args.ticks)
+            print(f"Simulated {args.simulate:,} animals with {scheduler.workers} worker(s):",
+                  scheduler.latency_summary())
+        sys.exit(0)
+
     # Create instances of each animal class
     polly = Bird("Polly")
     nemo = Fish("Nemo")
@@ -0,0 +1,455 @@
+# Benchmarks for the whole project
+#
+# Every benchmark sets up its inputs in a scratch directory, then times one
+# operation a few times. Results are printed and can be saved as JSON and
+# compared with the JSON of an earlier commit to catch regressions:
+#
+#   python benchmarks.py --output before.json
+#   ... change the code ...
+#   python benchmarks.py --compare before.json
+#
+# --profile and --trace-memory write cProfile and tracemalloc reports of
+# each benchmark to --report-dir.
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPEAT = 5
+# A benchmark this much slower per unit of work than the baseline is a regression
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_REPORT_DIR = "benchmark_reports"
+# The number of functions / allocation sites listed in the reports
+REPORT_TOP = 25
+
+# Benchmark name -> setup function, filled in by @benchmark
+BENCHMARKS = {}
+
+
+def benchmark(**params):
+    """
+    Registers a benchmark setup function.
+
+    The function is called as `setup(workdir, scale, cleanup, **param)` and
+    returns `(run, work, unit)`: the callable to time, the amount of work one
+    call does (e.g. megabytes or calls) and the unit of that work. `cleanup`
+    is an ExitStack for anything to tear down afterwards. A keyword argument
+    with a list registers one benchmark per value, e.g. @benchmark(apps=[10, 100]).
+    """
+    def register(function):
+        if not params:
+            BENCHMARKS[function.__name__] = function
+            return function
+        (param, values), = params.items()
+        for value in values:
+            def setup(workdir, scale, cleanup, value=value):
+                return function(workdir, scale, cleanup, **{param: value})
+            BENCHMARKS[f"{function.__name__}[{param}={value}]"] = setup
+        return function
+    return register
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+@benchmark(text=['ascii', 'unicode'])
+def process_file(workdir, scale, cleanup, text):
+    """FileHandling.process_file throughput; ASCII input takes the memory-mapped fast path."""
+    import FileHandling
+
+    line = ("The quick brown fox jumps over the lazy dog 0123456789\n" if text == 'ascii'
+            else "Grüße aus Köln, ça va? Ελληνικά και русский текст 0123456789\n")
+    size_mb = max(1, round(16 * scale))
+    input_path = os.path.join(workdir, 'input.txt')
+    output_path = os.path.join(workdir, 'output.txt')
+    line_bytes = len(line.encode('utf-8'))
+    with open(input_path, 'w', encoding='utf-8', newline='') as file:
+        file.write(line * (size_mb * 1024 * 1024 // line_bytes))
+
+    def run():
+        FileHandling.process_file(input_path, output_path, 'upper')
+
+    return run, os.path.getsize(input_path) / (1024 * 1024), 'MB'
+
+
+@benchmark()
+def calculate_discount(workdir, scale, cleanup):
+    """The cost of one discountCalculator.calculate_discount call."""
+    from discountCalculator import calculate_discount
+
+    calls = max(1, int(500_000 * scale))
+    prices = [(number % 1000) + 0.99 for number in range(calls)]
+    discounts = [number % 50 for number in range(calls)]
+
+    def run():
+        for price, discount in zip(prices, discounts):
+            calculate_discount(price, discount)
+
+    return run, calls, 'call'
+
+
+@benchmark()
+def load_and_clean_data(workdir, scale, cleanup):
+    """dataVisualizer.load_and_clean_data, with the dataset cache warm."""
+    import dataVisualizer
+
+    dataVisualizer.load_iris_frame()  # Fill the cache
+
+    def run():
+        dataVisualizer.load_and_clean_data()
+
+    return run, 1, 'load'
+
+
+@benchmark(rows=[150_000, 1_500_000])
+def perform_basic_analysis(workdir, scale, cleanup, rows):
+    """dataVisualizer.perform_basic_analysis on the Iris rows repeated to `rows` rows."""
+    import pandas as pd
+    import dataVisualizer
+
+    iris = dataVisualizer.load_iris_frame()
+    copies = max(1, round(rows * scale / len(iris)))
+    df = pd.concat([iris] * copies, ignore_index=True)
+
+    def run():
+        dataVisualizer.perform_basic_analysis(df)
+
+    return run, len(df), 'row'
+
+
+@benchmark(apps=[100, 1_000, 10_000])
+def install_app(workdir, scale, cleanup, apps):
+    """Smartphone.install_app, installing `apps` apps on a phone one at a time."""
+    from digitalDevice import Smartphone
+
+    names = [f"com.example.app{number:06d}" for number in range(max(1, int(apps * scale)))]
+
+    def run():
+        phone = Smartphone("Google", "Pixel 8", "555-123-4567")
+        for name in names:
+            phone.install_app(name)
+
+    return run, len(names), 'install'
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """Serves the same small PNG image at every path."""
+
+    body = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 64
+    protocol_version = 'HTTP/1.1'  # Keep connections alive
+    # Headers and body are separate writes; with Nagle's algorithm on, the
+    # body waits for the client's delayed ACK and every request takes ~40 ms
+    disable_nagle_algorithm = True
+
+    def send_image_headers(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.send_image_headers()
+
+    def do_GET(self):
+        self.send_image_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@benchmark()
+def fetch_and_save_image(workdir, scale, cleanup):
+    """ubuntuImageFetcher.fetch_and_save_image against a local HTTP server."""
+    import requests
+    import ubuntuImageFetcher
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cleanup.callback(server.server_close)
+    cleanup.callback(server.shutdown)
+    session = cleanup.enter_context(requests.Session())
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/images"
+    fetches = max(1, int(50 * scale))
+    runs = []
+
+    def run():
+        # A fresh directory every run: existing files would be skipped
+        output_dir = os.path.join(workdir, f"run{len(runs)}")
+        runs.append(output_dir)
+        fetched_urls = set()
+        for number in range(fetches):
+            status = ubuntuImageFetcher.fetch_and_save_image(f"{base_url}/photo{number}.png", fetched_urls,
+                                                             session=session, output_dir=output_dir)
+            if status != ubuntuImageFetcher.STATUS_FETCHED:
+                raise RuntimeError(f"Fetching from the local server failed with status {status!r}.")
+
+    return run, fetches, 'image'
+
+
+# ============================================================================
+# Running, Profiling and Comparing
+# ============================================================================
+
+@contextlib.contextmanager
+def quiet():
+    """Discards what the benchmarked code prints."""
+    with open(os.devnull, 'w', encoding='utf-8') as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+def write_profile_report(name, run, report_dir):
+    """Profiles one call of `run` and writes the hot paths, sorted by cumulative time."""
+    profiler = cProfile.Profile()
+    with quiet():
+        profiler.runcall(run)
+    base_path = os.path.join(report_dir, name)
+    profiler.dump_stats(f"{base_path}.prof")
+    with open(f"{base_path}.profile.txt", 'w', encoding='utf-8') as report:
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(REPORT_TOP)
+    return f"{base_path}.profile.txt"
+
+
+def write_memory_report(name, run, report_dir):
+    """Traces the allocations of one call of `run` and writes the top allocation sites."""
+    tracemalloc.start()
+    try:
+        with quiet():
+            run()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    with open(os.path.join(report_dir, f"{name}.memory.txt"), 'w', encoding='utf-8') as report:
+        report.write(f"Peak traced memory: {peak:,} bytes\n\n")
+        for statistic in snapshot.statistics('lineno')[:REPORT_TOP]:
+            report.write(f"{statistic}\n")
+    return peak
+
+
+def run_benchmarks(names, repeat=DEFAULT_REPEAT, scale=1.0, profile=False, trace_memory=False,
+                   report_dir=DEFAULT_REPORT_DIR):
+    """
+    Runs benchmarks and returns their results.
+
+    Each benchmark is run once to warm up and then timed `repeat` times.
+
+    Args:
+        names (list): The benchmarks to run (keys of BENCHMARKS).
+        repeat (int): The number of timed runs.
+        scale (float): Multiplies the size of the generated inputs.
+        profile (bool): Also write a cProfile report of every benchmark.
+        trace_memory (bool): Also write a tracemalloc report of every benchmark.
+        report_dir (str): Where the reports are written.
+
+    Returns:
+        dict: The results, keyed by benchmark name.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1.")
+    if profile or trace_memory:
+        os.makedirs(report_dir, exist_ok=True)
+
+    results = {}
+    for name in names:
+        with tempfile.TemporaryDirectory(prefix='benchmark-') as workdir, contextlib.ExitStack() as cleanup:
+            with quiet():
+                run, work, unit = BENCHMARKS[name](workdir, scale, cleanup)
+                run()  # Warm-up
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - start)
+
+            median = statistics.median(timings)
+            result = {
+                'unit': unit,
+                'work': work,
+                'repeat': repeat,
+                'min_seconds': min(timings),
+                'median_seconds': median,
+                'stdev_seconds': statistics.stdev(timings) if repeat > 1 else 0.0,
+                'seconds_per_unit': median / work,
+                'units_per_second': work / median,
+            }
+            if profile:
+                result['profile_report'] = write_profile_report(name, run, report_dir)
+            if trace_memory:
+                result['peak_memory_bytes'] = write_memory_report(name, run, report_dir)
+        results[name] = result
+        print(format_result(name, result), flush=True)
+    return results
+
+
+def format_result(name, result):
+    """Formats one result as a line of the report."""
+    per_unit = result['seconds_per_unit']
+    if per_unit < 1e-3:
+        per_unit_text = f"{per_unit * 1e6:,.2f} µs/{result['unit']}"
+    else:
+        per_unit_text = f"{per_unit * 1e3:,.2f} ms/{result['unit']}"
+    line = (f"{name:<40} {result['median_seconds']:>9.4f}s  ±{result['stdev_seconds']:.4f}  "
+            f"{result['units_per_second']:>14,.1f} {result['unit']}/s  {per_unit_text}")
+    if 'peak_memory_bytes' in result:
+        line += f"  peak {result['peak_memory_bytes'] / (1024 * 1024):,.1f} MB"
+    return line
+
+
+def environment():
+    """Describes where the benchmarks ran, so results from different commits can be told apart."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparison_problems(current_environment, baseline_environment):
+    """
+    Lists the differences between two runs that make their timings incomparable.
+
+    The inputs of some benchmarks grow with --scale and their cost per unit
+    grows with them (e.g. install_app), so runs at different scales would
+    report false regressions. A different Python or number of CPUs is only
+    worth a warning.
+
+    Returns:
+        tuple: (errors, warnings), lists of messages.
+    """
+    errors, warnings = [], []
+    if current_environment.get('scale') != baseline_environment.get('scale'):
+        errors.append(f"the baseline ran at --scale {baseline_environment.get('scale')}, "
+                      f"this run at {current_environment.get('scale')}")
+    for key, label in (('python', "Python"), ('cpus', "CPU count"), ('platform', "platform")):
+        if current_environment.get(key) != baseline_environment.get(key):
+            warnings.append(f"the {label} differs: {baseline_environment.get(key)} in the baseline, "
+                            f"{current_environment.get(key)} now")
+    return errors, warnings
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with those of an earlier run, by time per unit of work.
+
+    Only the benchmarks in both runs are compared. Check the environments
+    with comparison_problems first.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The results of the earlier run.
+        threshold (float): The relative slowdown that counts as a regression.
+
+    Returns:
+        list: The names of the benchmarks that regressed.
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('environment', {}).get('commit') or 'the baseline'}:")
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            print(f"  {name:<40} new, not in the baseline")
+            continue
+        change = result['seconds_per_unit'] / before['seconds_per_unit'] - 1
+        if change > threshold:
+            verdict = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            verdict = "faster"
+        else:
+            verdict = "unchanged"
+        print(f"  {name:<40} {change:+7.1%}  {verdict}")
+    return regressions
+
+
+def parse_args(argv=None):
+    """Parses the command-line options."""
+    parser = argparse.ArgumentParser(description="Benchmark the project and compare runs.")
+    parser.add_argument("-k", "--filter", action="append", metavar="TEXT",
+                        help="only run benchmarks whose name contains TEXT (can be repeated)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"timed runs per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the size of the generated inputs (default: 1.0)")
+    parser.add_argument("-o", "--output", metavar="PATH", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare with the JSON results of an earlier run; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"relative slowdown counted as a regression (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a cProfile report of each benchmark to --report-dir")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="write a tracemalloc report of each benchmark to --report-dir")
+    parser.add_argument("--report-dir", default=DEFAULT_REPORT_DIR,
+                        help=f"where profiling reports go (default: {DEFAULT_REPORT_DIR})")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.scale <= 0:
+        parser.error("--scale must be greater than 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name for name in BENCHMARKS
+             if not args.filter or any(text in name for text in args.filter)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        print("No benchmark matches the filter.")
+        return 1
+
+    current_environment = {**environment(), 'scale': args.scale}
+    baseline = None
+    if args.compare:
+        # Check before spending minutes on the benchmarks
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        errors, warnings = comparison_problems(current_environment, baseline.get('environment', {}))
+        for warning in warnings:
+            print(f"Warning: {warning}.")
+        if errors:
+            print(f"Cannot compare with {args.compare}: {'; '.join(errors)}.")
+            return 2
+
+    # The benchmarked modules live next to this file
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    results = run_benchmarks(names, args.repeat, args.scale, args.profile, args.trace_memory, args.report_dir)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'environment': current_environment, 'results': results}, file, indent=2)
+        print(f"\nResults saved to {args.output}")
+    if baseline is not None:
+        if compare_results(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,22 @@
+import io
+import os
+import csv
+import sys
+import math
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Discounts below this percentage are not applied
+DISCOUNT_THRESHOLD = 20
+
+# Settings for pricing whole files
+DEFAULT_CHUNK_ROWS = 100_000
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
 def calculate_discount(price, discount_percent):
   """
   Calculates the final price after applying a discount.
@@ -10,24 +29,496 @@ def calculate_discount(price, discount_percent):
     The final price after applying the discount, or the original price if the
     discount is less than 20%.
   """
-  if discount_percent >= 20:
+  if discount_percent >= DISCOUNT_THRESHOLD:
     final_price = price - (price * (discount_percent / 100))
     return final_price
   else:
     return price
 
-# Prompt the user for input
-try:
-  original_price = float(input("Enter the original price: "))
-  discount_percentage = float(input("Enter the discount percentage: "))
-  
-  # Calculate and print the final price
-  final_price = calculate_discount(original_price, discount_percentage)
-  
-  if discount_percentage >= 20:
-    print(f"The final price after a {discount_percentage}% discount is: {final_price:.2f}")
+def exact_final_price(price, discount_percent, decimals=2):
+  """
+  Calculates a final price like calculate_discount, but in decimal
+  arithmetic, and rounds it with halves rounded up.
+
+  The price and the discount are taken as the decimal numbers they are
+  written as, so 1.15 at 30% off is exactly 0.805 and rounds to 0.81.
+
+  Args:
+    price: The original price of the item.
+    discount_percent: The discount percentage.
+    decimals: The number of decimal places to keep.
+
+  Returns:
+    The rounded final price as a float. If the price or the discount is
+    infinite or NaN, the unrounded result of calculate_discount.
+  """
+  price, discount_percent = float(price), float(discount_percent)
+  if not (math.isfinite(price) and math.isfinite(discount_percent)):
+    return calculate_discount(price, discount_percent)
+  final_price = Decimal(repr(price))
+  if discount_percent >= DISCOUNT_THRESHOLD:
+    final_price -= final_price * Decimal(repr(discount_percent)) / 100
+  return _round_decimal(final_price, decimals)
+
+def _round_decimal(value, decimals):
+  """Rounds a Decimal with halves rounded up, and returns it as a float."""
+  try:
+    return float(value.quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_UP))
+  except InvalidOperation:
+    # Too many digits for the decimal context: a float this large has no
+    # fractional digits left to round
+    return float(value)
+
+def calculate_discounts(prices, discount_percents, decimals=None):
+  """
+  Calculates the final prices of many items at once.
+
+  The same >= 20% rule as calculate_discount is applied with a vectorized
+  mask over NumPy arrays instead of a Python loop. The arithmetic is the
+  same, step by step, so every result is identical to calling
+  calculate_discount on each item.
+
+  Args:
+    prices: The original prices (a NumPy array, pandas Series or list).
+    discount_percents: The discount percentages, one per price, or a single
+      percentage for all of them.
+    decimals: If given, calculate each final price with exact_final_price
+      instead, rounded to this many decimals. This is exact but runs per
+      item, so it is much slower than the rest.
+
+  Returns:
+    The final prices, as a pandas Series with the same index if `prices`
+    was a Series, otherwise as a NumPy array of floats.
+  """
+  import numpy as np
+
+  price_array = np.asarray(prices, dtype=np.float64)
+  discount_array = np.asarray(discount_percents, dtype=np.float64)
+  discounted = price_array - (price_array * (discount_array / 100))
+  final_prices = np.where(discount_array >= DISCOUNT_THRESHOLD, discounted, price_array)
+
+  if decimals is not None:
+    price_array, discount_array = np.broadcast_arrays(price_array, discount_array)
+    final_prices = np.fromiter(
+      (exact_final_price(price, discount, decimals)
+       for price, discount in zip(price_array.flat, discount_array.flat)),
+      dtype=np.float64, count=final_prices.size).reshape(final_prices.shape)
+
+  # Keep the index of a pandas Series, without importing pandas here
+  if hasattr(prices, 'index') and hasattr(prices, 'to_numpy'):
+    return type(prices)(final_prices, index=prices.index, name=getattr(prices, 'name', None))
+  return final_prices
+
+def benchmark_bulk_pricing(count=1_000_000):
+  """
+  Compares pricing a catalog with a Python loop over calculate_discount
+  against one call to calculate_discounts, and checks both give the same results.
+
+  Args:
+    count: The number of generated catalog items.
+
+  Returns:
+    A dict with the elapsed seconds of both approaches and the speedup.
+  """
+  import numpy as np
+
+  rng = np.random.default_rng(0)
+  prices = rng.uniform(0.5, 500, count).round(2)
+  discounts = rng.integers(0, 60, count).astype(np.float64)
+
+  start = time.perf_counter()
+  loop_results = [calculate_discount(price, discount)
+                  for price, discount in zip(prices.tolist(), discounts.tolist())]
+  loop_seconds = time.perf_counter() - start
+
+  start = time.perf_counter()
+  bulk_results = calculate_discounts(prices, discounts)
+  bulk_seconds = time.perf_counter() - start
+
+  if not np.array_equal(np.array(loop_results), bulk_results):
+    raise AssertionError("calculate_discounts does not match calculate_discount")
+
+  print(f"Pricing {count:,} items:")
+  print(f"  Scalar loop: {loop_seconds:.3f}s ({count / loop_seconds:,.0f} items/s)")
+  print(f"  Vectorized:  {bulk_seconds:.3f}s ({count / bulk_seconds:,.0f} items/s)")
+  print(f"  Speedup:     {loop_seconds / bulk_seconds:.1f}x (results identical)")
+  return {'loop_seconds': loop_seconds, 'bulk_seconds': bulk_seconds,
+          'speedup': loop_seconds / bulk_seconds}
+
+# ============================================================================
+# Pricing whole files
+#
+# A price list is read in chunks of rows, priced with calculate_discounts and
+# written out before the next chunk is read, so memory use depends on the
+# chunk size and not on the size of the file.
+# ============================================================================
+
+def is_parquet(path):
+  """Returns True if the path has a Parquet file extension (otherwise CSV is assumed)."""
+  return path.lower().endswith(PARQUET_EXTENSIONS)
+
+class ByteRangeReader(io.RawIOBase):
+  """A read-only file object that only sees the bytes between `start` and `end`."""
+
+  def __init__(self, path, start, end):
+    super().__init__()
+    self._file = open(path, 'rb')
+    self._file.seek(start)
+    self._remaining = end - start
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    if self._remaining <= 0:
+      return 0
+    count = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._remaining)])
+    self._remaining -= count
+    return count
+
+  def close(self):
+    self._file.close()
+    super().close()
+
+def iter_price_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, byte_range=None, columns=None,
+                      row_groups=None):
+  """
+  Reads a CSV or Parquet price list as a series of DataFrames.
+
+  Args:
+    path: The input file.
+    chunk_rows: The maximum number of rows per chunk.
+    byte_range: For CSV, only read the lines in this (start, end) byte range.
+      The range must start and end on a line boundary and skip the header.
+    columns: For CSV with a byte range, the column names from the header.
+    row_groups: For Parquet, only read these row groups.
+
+  Yields:
+    pandas DataFrames of at most `chunk_rows` rows.
+  """
+  import pandas as pd
+
+  if is_parquet(path):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, row_groups=row_groups):
+      yield batch.to_pandas()
+  elif byte_range is None:
+    yield from pd.read_csv(path, chunksize=chunk_rows)
+  elif byte_range[0] < byte_range[1]:
+    with io.BufferedReader(ByteRangeReader(path, *byte_range)) as range_file:
+      yield from pd.read_csv(range_file, header=None, names=columns, chunksize=chunk_rows)
+
+def price_chunk(chunk, price_column='price', discount_column='discount', discount=None,
+                output_column='final_price', decimals=None):
+  """
+  Adds the final price to a chunk of a price list.
+
+  Args:
+    chunk: A DataFrame of items.
+    price_column: The column holding the original prices.
+    discount_column: The column holding the discount percentages.
+    discount: A discount percentage for every item, used instead of `discount_column`.
+    output_column: The column to store the final prices in.
+    decimals: Optional exact rounding, as in calculate_discounts.
+
+  Returns:
+    The same DataFrame, with `output_column` filled in.
+  """
+  # Promote the inputs to float64, so every chunk has the same column types
+  # (a chunk of whole numbers would otherwise be read as int64) and a Parquet
+  # schema taken from the first chunk fits all the others
+  chunk[price_column] = chunk[price_column].astype('float64')
+  if discount is None:
+    chunk[discount_column] = chunk[discount_column].astype('float64')
+    discount = chunk[discount_column]
+  chunk[output_column] = calculate_discounts(chunk[price_column], discount, decimals)
+  return chunk
+
+class PriceWriter:
+  """Writes priced chunks to a CSV or Parquet file, one chunk at a time."""
+
+  def __init__(self, path, write_header=True):
+    """
+    Args:
+      path: The output file. Its extension picks the format.
+      write_header: For CSV, whether to start with a header line.
+    """
+    self.path = path
+    self._write_header = write_header
+    self._parquet_writer = None
+    self._csv_file = None if is_parquet(path) else open(path, 'w', newline='', encoding='utf-8')
+
+  def write(self, chunk):
+    """Appends a chunk to the file."""
+    if self._csv_file is not None:
+      chunk.to_csv(self._csv_file, header=self._write_header, index=False)
+      self._write_header = False
+      return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    if self._parquet_writer is None:
+      self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+    else:
+      # Chunks of a CSV can infer different types (e.g. int and float)
+      table = table.cast(self._parquet_writer.schema)
+    self._parquet_writer.write_table(table)
+
+  def close(self):
+    """Finishes the file."""
+    if self._csv_file is not None:
+      self._csv_file.close()
+    if self._parquet_writer is not None:
+      self._parquet_writer.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+def split_csv_ranges(path, parts):
+  """
+  Splits the data lines of a CSV file into byte ranges of about equal size.
+
+  Each range starts at the beginning of a line, so every line belongs to
+  exactly one range. Quoted values that contain line breaks are not supported.
+
+  Args:
+    path: The CSV file.
+    parts: The number of ranges wanted.
+
+  Returns:
+    The column names from the header, and a list of (start, end) byte ranges.
+  """
+  size = os.path.getsize(path)
+  with open(path, 'rb') as f:
+    header = f.readline()
+    bounds = [f.tell()]
+    for part in range(1, parts):
+      target = bounds[0] + (size - bounds[0]) * part // parts
+      if target <= bounds[-1]:
+        continue
+      # Move forward to the start of the next line
+      f.seek(target - 1)
+      f.readline()
+      if bounds[-1] < f.tell() < size:
+        bounds.append(f.tell())
+    bounds.append(size)
+  columns = next(csv.reader([header.decode('utf-8-sig')]))
+  return columns, list(zip(bounds[:-1], bounds[1:]))
+
+def price_file_part(job):
+  """
+  Prices one part of an input file into its own part file. Runs in a worker process.
+
+  Args:
+    job: (input path, part path, part spec, pricing options).
+      The part spec is a dict of keyword arguments for iter_price_chunks.
+      CSV parts have no header, so they can simply be joined end to end.
+
+  Returns:
+    The number of rows priced.
+  """
+  input_path, part_path, part_spec, options = job
+  rows = 0
+  with PriceWriter(part_path, write_header=False) as writer:
+    for chunk in iter_price_chunks(input_path, options['chunk_rows'], **part_spec):
+      writer.write(price_chunk(chunk, options['price_column'], options['discount_column'],
+                               options['discount'], options['output_column'],
+                               options['decimals']))
+      rows += len(chunk)
+  return rows
+
+def price_file(input_path, output_path, price_column='price', discount_column='discount',
+               discount=None, output_column='final_price', chunk_rows=DEFAULT_CHUNK_ROWS,
+               decimals=None, workers=1):
+  """
+  Applies the discount rule to every row of a CSV or Parquet price list.
+
+  With one worker the file is streamed chunk by chunk. With more workers the
+  input is split into one part per worker (byte ranges of a CSV, row groups
+  of a Parquet file), each worker streams its part into a part file, and the
+  part files are joined in order into the output. Memory use stays bounded by
+  the chunk size either way.
+
+  Args:
+    input_path: The price list to read (.csv, or .parquet/.pq).
+    output_path: The file to write, in the format given by its extension.
+      It contains all input columns plus `output_column`.
+    price_column: The column holding the original prices.
+    discount_column: The column holding the discount percentages.
+    discount: A discount percentage for every item, used instead of `discount_column`.
+    output_column: The column to store the final prices in.
+    chunk_rows: The number of rows held in memory at a time (per worker).
+    decimals: Optional exact rounding, as in calculate_discounts.
+    workers: The number of worker processes.
+
+  Returns:
+    A dict with the number of rows, the elapsed seconds and the rows per second.
+  """
+  options = {'price_column': price_column, 'discount_column': discount_column,
+             'discount': discount, 'output_column': output_column,
+             'chunk_rows': chunk_rows, 'decimals': decimals}
+  start = time.perf_counter()
+
+  if workers <= 1:
+    rows = 0
+    with PriceWriter(output_path) as writer:
+      for chunk in iter_price_chunks(input_path, chunk_rows):
+        writer.write(price_chunk(chunk, price_column, discount_column, discount,
+                                 output_column, decimals))
+        rows += len(chunk)
+  else:
+    rows = price_file_in_parallel(input_path, output_path, options, workers)
+
+  elapsed = time.perf_counter() - start
+  return {'rows': rows, 'seconds': elapsed,
+          'rows_per_second': rows / elapsed if elapsed > 0 else 0.0}
+
+def price_file_in_parallel(input_path, output_path, options, workers):
+  """
+  The multi-process part of price_file.
+
+  Returns:
+    The number of rows priced.
+  """
+  if is_parquet(input_path):
+    import pyarrow.parquet as pq
+
+    # Give each worker a contiguous run of row groups, so the order is kept
+    group_count = pq.ParquetFile(input_path).num_row_groups
+    specs = []
+    for part in range(workers):
+      groups = list(range(group_count * part // workers, group_count * (part + 1) // workers))
+      if groups:
+        specs.append({'row_groups': groups})
+    header = None
   else:
-    print(f"The discount is less than 20%. The original price of {original_price:.2f} remains unchanged.")
+    columns, ranges = split_csv_ranges(input_path, workers)
+    specs = [{'byte_range': byte_range, 'columns': columns} for byte_range in ranges]
+    # price_chunk adds the output column after the input columns
+    output_column = options['output_column']
+    header = columns + ([output_column] if output_column not in columns else [])
+
+  extension = os.path.splitext(output_path)[1]
+  part_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output_path)))
+  try:
+    part_paths = [os.path.join(part_dir, f"part-{number:05d}{extension}")
+                  for number in range(len(specs))]
+    jobs = [(input_path, part_path, spec, options) for part_path, spec in zip(part_paths, specs)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      rows = sum(executor.map(price_file_part, jobs))
+    join_part_files(part_paths, output_path, header)
+  finally:
+    shutil.rmtree(part_dir, ignore_errors=True)
+  return rows
+
+def join_part_files(part_paths, output_path, header=None):
+  """
+  Joins the part files written by the workers into the output file, in order.
+
+  CSV parts are copied byte for byte after the header line, which is written
+  here so it is there even when some parts are empty. Parquet parts are
+  copied over batch by batch.
+
+  Args:
+    part_paths: The part files, in order. Missing ones are skipped.
+    output_path: The file to write.
+    header: For CSV, the column names of the output.
+  """
+  if not is_parquet(output_path):
+    with open(output_path, 'w', newline='', encoding='utf-8') as output:
+      if header is not None:
+        csv.writer(output, lineterminator=os.linesep).writerow(header)
+      output.flush()
+      for part_path in part_paths:
+        if os.path.exists(part_path):
+          with open(part_path, 'rb') as part:
+            shutil.copyfileobj(part, output.buffer)
+    return
+
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+
+  writer = None
+  try:
+    for part_path in part_paths:
+      if not os.path.exists(part_path):
+        continue
+      part = pq.ParquetFile(part_path)
+      if writer is None:
+        writer = pq.ParquetWriter(output_path, part.schema_arrow)
+      for batch in part.iter_batches():
+        # Other columns of a CSV can still infer different types per part
+        writer.write_table(pa.Table.from_batches([batch]).cast(writer.schema))
+  finally:
+    if writer is not None:
+      writer.close()
+
+def parse_args(argv=None):
+  """Parses the command-line options."""
+  parser = argparse.ArgumentParser(
+    description="Discount calculator. Without options, asks for one price and discount.")
+  parser.add_argument("--benchmark", type=int, metavar="COUNT",
+                      help="compare scalar and vectorized pricing of COUNT items and exit")
+  parser.add_argument("--input", metavar="PATH",
+                      help="price list to process (.csv, or .parquet/.pq)")
+  parser.add_argument("--output", metavar="PATH",
+                      help="file to write the priced list to (.csv, or .parquet/.pq)")
+  parser.add_argument("--price-column", default="price",
+                      help="column holding the original prices (default: price)")
+  parser.add_argument("--discount-column", default="discount",
+                      help="column holding the discount percentages (default: discount)")
+  parser.add_argument("--discount", type=float,
+                      help="apply this discount percentage to every row instead")
+  parser.add_argument("--output-column", default="final_price",
+                      help="column to write the final prices to (default: final_price)")
+  parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                      help=f"rows held in memory at a time (default: {DEFAULT_CHUNK_ROWS})")
+  parser.add_argument("--decimals", type=int,
+                      help="round final prices to this many decimals, exactly")
+  parser.add_argument("--workers", type=int, default=1,
+                      help="number of worker processes (default: 1)")
+  args = parser.parse_args(argv)
+  if bool(args.input) != bool(args.output):
+    parser.error("--input and --output must be given together")
+  return args
+
+if __name__ == "__main__":
+  args = parse_args()
+  if args.benchmark is not None:
+    benchmark_bulk_pricing(args.benchmark)
+    sys.exit()
+
+  if args.input:
+    try:
+      stats = price_file(args.input, args.output, args.price_column, args.discount_column,
+                         args.discount, args.output_column, args.chunk_rows, args.decimals,
+                         args.workers)
+    except (OSError, KeyError, ValueError) as e:
+      print(f"Could not price {args.input}: {e}")
+      sys.exit(1)
+    print(f"Priced {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s). Written to {args.output}.")
+    sys.exit()
+
+  # Prompt the user for input
+  try:
+    original_price = float(input("Enter the original price: "))
+    discount_percentage = float(input("Enter the discount percentage: "))
+    
+    # Calculate and print the final price
+    final_price = calculate_discount(original_price, discount_percentage)
+    
+    if discount_percentage >= DISCOUNT_THRESHOLD:
+      print(f"The final price after a {discount_percentage}% discount is: {final_price:.2f}")
+    else:
+      print(f"The discount is less than 20%. The original price of {original_price:.2f} remains unchanged.")
 
-except ValueError:
-  print("Invalid input. Please enter a valid number for price and discount percentage.")
\ No newline at end of file
+  except ValueError:
+    print("Invalid input. Please enter a valid number for price and discount percentage.")
\ No newline at end of file
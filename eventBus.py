@@ -0,0 +1,377 @@
+import os
+import sys
+import json
+import time
+import atexit
+import asyncio
+import argparse
+import threading
+from collections import deque, namedtuple
+
+# A structured event: its type (e.g. 'device.power_on'), a human-readable
+# message, extra fields, and when it happened (seconds since the epoch)
+Event = namedtuple('Event', ['type', 'message', 'data', 'time'])
+
+# Bus defaults
+DEFAULT_MAX_QUEUE = 100_000
+DEFAULT_BATCH_SIZE = 1_000
+DEFAULT_FLUSH_INTERVAL = 0.05  # Seconds a partial batch may wait before delivery
+DEFAULT_BLOCK_TIMEOUT = 1.0
+
+# What emit() does when the queue is full
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+
+# ============================================================================
+# Sinks
+#
+# A sink receives the events in batches, on the bus's background thread.
+# ============================================================================
+
+class EventSink:
+    """The interface of a sink. Subclasses implement write_batch."""
+
+    def write_batch(self, events):
+        """Delivers a list of events."""
+        raise NotImplementedError
+
+    def close(self):
+        """Releases the sink's resources. Called when the bus is closed."""
+
+
+class ConsoleSink(EventSink):
+    """Prints the message of every event, one write per batch."""
+
+    def __init__(self, stream=None):
+        """
+        Args:
+            stream (file, optional): Where to write (default: sys.stdout at the time of writing).
+        """
+        self.stream = stream
+
+    def write_batch(self, events):
+        stream = self.stream or sys.stdout
+        stream.write(''.join(f"{event.message}\n" for event in events))
+        stream.flush()
+
+
+class JsonLinesSink(EventSink):
+    """Appends every event to a file as one JSON object per line."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The file to append to.
+        """
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write_batch(self, events):
+        self._file.write(''.join(
+            json.dumps({'type': event.type, 'time': event.time, 'message': event.message, **event.data},
+                       ensure_ascii=False) + '\n'
+            for event in events))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class MemorySink(EventSink):
+    """Keeps the events in memory, e.g. for tests. With `max_events`, only the latest ones."""
+
+    def __init__(self, max_events=None):
+        self.events = deque(maxlen=max_events)
+
+    def write_batch(self, events):
+        self.events.extend(events)
+
+
+# ============================================================================
+# The Bus
+# ============================================================================
+
+class EventBus:
+    """
+    A bounded queue of events, drained in batches by a background task.
+
+    emit() only appends to the queue, so it is cheap and never waits for
+    I/O. An asyncio task on a background thread takes the events off in
+    batches of up to `batch_size`, as soon as a batch is full or at least
+    every `flush_interval` seconds, and hands each batch to every sink.
+
+    When the queue holds `max_queue` events, `overflow` decides what emit()
+    does: 'drop_newest' drops the new event, 'drop_oldest' drops the oldest
+    queued one, and 'block' waits up to `block_timeout` seconds for room and
+    then drops the new event. Dropped events are counted in stats().
+
+    The queue and the counters are guarded by one lock, so emit() may be
+    called from any number of threads. The sinks are only ever called from
+    the background thread, outside the lock.
+
+    Example:
+        with EventBus([ConsoleSink()]) as bus:
+            set_event_bus(bus)
+            ...
+    """
+
+    def __init__(self, sinks, max_queue=DEFAULT_MAX_QUEUE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, overflow='drop_newest',
+                 block_timeout=DEFAULT_BLOCK_TIMEOUT):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}.")
+        self.sinks = list(sinks)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._queue = deque()
+        # Guards the queue, the counters and the flags below. _space shares the
+        # lock and is notified when the queue has been drained.
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._wakeup_pending = False
+        self._closed = False
+        self._counters = {'emitted': 0, 'delivered': 0, 'dropped': 0, 'batches': 0, 'sink_errors': 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='event-bus', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        # Deliver what is still queued when the interpreter exits
+        atexit.register(self.close)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._started.set()
+        try:
+            self._loop.run_until_complete(self._drain())
+        finally:
+            self._loop.close()
+            for sink in self.sinks:
+                try:
+                    sink.close()
+                except Exception:
+                    # A failing sink must not keep the others open
+                    with self._lock:
+                        self._counters['sink_errors'] += 1
+
+    async def _drain(self):
+        """The background task: delivers queued events until the bus is closed."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            with self._lock:
+                self._wakeup_pending = False
+            self._deliver_queued()
+            if self._closed:
+                self._deliver_queued()
+                # Finish the flush() calls scheduled before close(), or they would wait forever
+                await asyncio.sleep(0)
+                await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+                return
+
+    def _deliver_queued(self):
+        """Hands everything in the queue to the sinks, `batch_size` events at a time."""
+        while True:
+            # Take the whole queue at once, so emit() rarely waits for the lock
+            with self._space:
+                if not self._queue:
+                    return
+                events = list(self._queue)
+                self._queue = deque()
+                self._space.notify_all()
+            for start in range(0, len(events), self.batch_size):
+                batch = events[start:start + self.batch_size]
+                sink_errors = 0
+                for sink in self.sinks:
+                    try:
+                        sink.write_batch(batch)
+                    except Exception:
+                        # A failing sink must not stop delivery to the others
+                        sink_errors += 1
+                with self._lock:
+                    self._counters['sink_errors'] += sink_errors
+                    self._counters['delivered'] += len(batch)
+                    self._counters['batches'] += 1
+
+    def emit(self, event):
+        """
+        Queues an event. Safe to call from any thread.
+
+        Returns:
+            bool: False if the event was dropped.
+        """
+        with self._lock:
+            if self._closed or (len(self._queue) >= self.max_queue and not self._make_room()):
+                self._counters['dropped'] += 1
+                return False
+            self._queue.append(event)
+            self._counters['emitted'] += 1
+            if len(self._queue) >= self.batch_size:
+                self._request_delivery()
+        return True
+
+    def _request_delivery(self):
+        """Wakes the background task, once until it runs. Call with the lock held."""
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _make_room(self):
+        """
+        Applies the overflow policy to a full queue. Call with the lock held.
+
+        Returns:
+            bool: True if the new event may be queued.
+        """
+        if self.overflow == 'drop_oldest':
+            self._queue.popleft()
+            self._counters['dropped'] += 1
+            return True
+        if self.overflow == 'block' and threading.current_thread() is not self._thread:
+            self._request_delivery()
+            # Releases the lock while waiting, so the queue can be drained
+            return self._space.wait_for(lambda: len(self._queue) < self.max_queue or self._closed,
+                                        self.block_timeout) and not self._closed
+        return False
+
+    def flush(self, timeout=None):
+        """Waits until every event emitted so far has been delivered to the sinks."""
+        if threading.current_thread() is self._thread:
+            return
+
+        async def deliver():
+            self._deliver_queued()
+
+        with self._lock:
+            if self._closed:
+                return
+            # Scheduled under the lock, so it runs before close() stops the loop
+            future = asyncio.run_coroutine_threadsafe(deliver(), self._loop)
+        future.result(timeout)
+
+    def stats(self):
+        """Returns the event counters and the current queue depth."""
+        with self._lock:
+            return {**self._counters, 'queued': len(self._queue)}
+
+    def close(self):
+        """
+        Delivers the queued events, stops the background task and closes the sinks.
+
+        Called from a sink (on the background thread), it returns right away
+        and the bus shuts down once the current delivery is finished.
+        """
+        with self._space:
+            if self._closed:
+                return
+            self._closed = True
+            self._space.notify_all()  # Blocked emit() calls give up
+        self._loop.call_soon_threadsafe(self._wake.set)
+        atexit.unregister(self.close)
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ============================================================================
+# The Process-Wide Bus
+#
+# The device and animal classes report what they do with emit(). Until a bus
+# is installed with set_event_bus(), emit() prints the message right away,
+# exactly as those classes used to.
+# ============================================================================
+
+_event_bus = None
+
+
+def set_event_bus(bus):
+    """Installs the bus that emit() sends events to (None restores printing)."""
+    global _event_bus
+    _event_bus = bus
+
+
+def get_event_bus():
+    """Returns the installed bus, or None."""
+    return _event_bus
+
+
+def emit(event_type, message, **data):
+    """
+    Reports that something happened.
+
+    Args:
+        event_type (str): The type of the event, e.g. 'device.power_on'.
+        message (str): A human-readable description.
+        **data: Extra fields of the event.
+    """
+    bus = _event_bus
+    if bus is None:
+        print(message)
+    else:
+        bus.emit(Event(event_type, message, data, time.time()))
+
+
+def benchmark_event_bus(count=1_000_000):
+    """
+    Compares `count` Animal.move() calls that print each line against the
+    same calls emitting onto a bus with a console sink. Both write to
+    os.devnull, line-buffered like a terminal, so the difference is the
+    number of writes rather than the speed of a real console.
+
+    Returns:
+        dict: The elapsed seconds of both approaches and the speedup.
+    """
+    import contextlib
+    from animalActions import Bird
+
+    birds = [Bird(f"Bird{number}") for number in range(count)]
+    with open(os.devnull, 'w', encoding='utf-8', buffering=1) as sink:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sink):
+            for bird in birds:
+                bird.move()
+        print_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with EventBus([ConsoleSink(sink)], max_queue=count) as bus:
+            set_event_bus(bus)
+            try:
+                for bird in birds:
+                    bird.move()
+            finally:
+                set_event_bus(None)
+            emit_seconds = time.perf_counter() - start
+        total_seconds = time.perf_counter() - start
+        stats = bus.stats()
+
+    print(f"{count:,} Animal.move() calls:")
+    print(f"  print() per call:    {print_seconds:.3f}s")
+    print(f"  Event bus (caller):  {emit_seconds:.3f}s ({print_seconds / emit_seconds:.1f}x)")
+    print(f"  Event bus (drained): {total_seconds:.3f}s, {stats['batches']:,} batches, "
+          f"{stats['dropped']:,} dropped")
+    return {'print_seconds': print_seconds, 'emit_seconds': emit_seconds,
+            'total_seconds': total_seconds, 'speedup': print_seconds / emit_seconds}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the event bus.")
+    parser.add_argument("--benchmark", type=int, metavar="COUNT", default=1_000_000,
+                        help="the number of events (default: 1000000)")
+    # Run it from the imported module: the animal classes emit through
+    # `eventBus`, not through this `__main__` copy of it
+    import eventBus
+    eventBus.benchmark_event_bus(parser.parse_args().benchmark)
@@ -0,0 +1,217 @@
+import os
+
+import pytest
+
+import FileHandling
+from FileHandling import (ASCII_TRANSLATION_TABLES, CHUNK_TRANSFORMS, LINE_TRANSFORMS, collect_input_files,
+                          mmap_translate_file, process_files_in_parallel, resolve_transform, stream_transform_file)
+
+TEXT = "Hello, World!\r\nΟΔΟΣ ΚΑΙ ΣΟΦΙΑ\nstraße   \t\r\n日本語 ÉCOLE 😀 mixed Case\rlast line  "
+
+
+def write_text(path, text):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def expected_output(text, transform):
+    """The transform applied to the whole text at once, or line by line for line transforms."""
+    function, needs_lines = resolve_transform(transform)
+    if needs_lines:
+        return "".join(function(line) for line in text.splitlines(keepends=True))
+    return function(text)
+
+
+# ============================================================================
+# Streaming transforms
+# ============================================================================
+
+@pytest.mark.parametrize('transform', sorted(CHUNK_TRANSFORMS) + sorted(LINE_TRANSFORMS))
+@pytest.mark.parametrize('chunk_size', [1, 3, 4, 1024])
+def test_streaming_matches_transforming_the_whole_text(tmp_path, transform, chunk_size):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, TEXT * 20)
+
+    stream_transform_file(input_path, output_path, transform, chunk_size=chunk_size, fast_path=False)
+
+    assert read_text(output_path) == expected_output(TEXT * 20, transform)
+
+
+@pytest.mark.parametrize('transform', ['lower', 'swapcase'])
+def test_final_sigma_does_not_depend_on_the_chunk_size(tmp_path, transform):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, 'ΟΔΟΣ ' * 10)
+
+    stream_transform_file(input_path, output_path, transform, chunk_size=4)
+
+    assert read_text(output_path) == getattr(str, transform)('ΟΔΟΣ ' * 10)
+    assert read_text(output_path).startswith('οδος')
+
+
+@pytest.mark.parametrize('offset', range(8185, 8195))
+def test_multibyte_characters_split_across_reads(tmp_path, offset):
+    # The file is read 8 KiB at a time, so one of these offsets splits the
+    # 4-byte emoji, and others the 2- and 3-byte characters after it
+    text = "a" * offset + "😀ß日" * 3 + "z"
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, text)
+
+    characters = stream_transform_file(input_path, output_path, 'upper', chunk_size=4096)
+
+    assert read_text(output_path) == text.upper()
+    assert characters == len(text.upper())
+
+
+def test_output_only_appears_once_complete(tmp_path):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, "abc" * 100)
+    write_text(output_path, "old output")
+    seen = []
+
+    def upper_and_look(text):
+        # While the transform runs, the old output is still in place
+        seen.append(read_text(output_path))
+        return text.upper()
+
+    stream_transform_file(input_path, output_path, upper_and_look, chunk_size=50)
+
+    assert set(seen) == {"old output"}
+    assert read_text(output_path) == "ABC" * 100
+    assert sorted(os.listdir(tmp_path)) == ['input.txt', 'output.txt']
+
+
+def test_a_failed_transform_keeps_the_old_output(tmp_path):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, "abc" * 100)
+    write_text(output_path, "old output")
+    calls = []
+
+    def fail_on_second_chunk(text):
+        calls.append(text)
+        if len(calls) == 2:
+            raise RuntimeError("transform failed")
+        return text.upper()
+
+    with pytest.raises(RuntimeError):
+        stream_transform_file(input_path, output_path, fail_on_second_chunk, chunk_size=50)
+
+    assert read_text(output_path) == "old output"
+    assert sorted(os.listdir(tmp_path)) == ['input.txt', 'output.txt']
+
+
+def test_unknown_transform():
+    with pytest.raises(ValueError, match="Unknown transform 'reverse'"):
+        resolve_transform('reverse')
+
+
+# ============================================================================
+# Memory-mapped ASCII fast path
+# ============================================================================
+
+ASCII_TEXT = "The quick brown fox\r\njumps over the lazy dog. 0123456789 ~!@#\n" * 50
+
+
+@pytest.mark.parametrize('transform', sorted(ASCII_TRANSLATION_TABLES))
+@pytest.mark.parametrize('text', [ASCII_TEXT, ASCII_TEXT + "caf\u00e9 ΟΔΟΣ\n" + ASCII_TEXT, ""])
+def test_fast_path_matches_the_text_path(tmp_path, transform, text):
+    input_path = tmp_path / 'input.txt'
+    write_text(input_path, text)
+
+    fast = stream_transform_file(input_path, tmp_path / 'fast.txt', transform)
+    slow = stream_transform_file(input_path, tmp_path / 'slow.txt', transform, fast_path=False)
+
+    assert read_text(tmp_path / 'fast.txt') == read_text(tmp_path / 'slow.txt') == expected_output(text, transform)
+    # The fast path counts bytes and the text path characters: the same for ASCII
+    assert fast == slow
+
+
+@pytest.mark.parametrize('window_size', [1, 7, 64, 1 << 20])
+def test_mmap_translate_file_in_windows(tmp_path, window_size):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, ASCII_TEXT)
+
+    size = mmap_translate_file(input_path, output_path, ASCII_TRANSLATION_TABLES['swapcase'], window_size)
+
+    assert size == len(ASCII_TEXT)
+    assert read_text(output_path) == ASCII_TEXT.swapcase()
+
+
+def test_mmap_translate_file_gives_up_on_non_ascii_input(tmp_path):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    # The non-ASCII byte is in a late window, after some output was written
+    write_text(input_path, ASCII_TEXT + "\u00e9")
+
+    size = mmap_translate_file(input_path, output_path, ASCII_TRANSLATION_TABLES['upper'], window_size=64)
+
+    assert size is None
+    assert os.listdir(tmp_path) == ['input.txt']
+
+
+def test_non_ascii_input_falls_back_to_the_text_path(tmp_path, monkeypatch):
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    write_text(input_path, ASCII_TEXT + "stra\u00dfe\n")
+    fast_path_results = []
+
+    def recording_mmap_translate_file(*args, **kwargs):
+        fast_path_results.append(mmap_translate_file(*args, **kwargs))
+        return fast_path_results[-1]
+
+    monkeypatch.setattr(FileHandling, 'mmap_translate_file', recording_mmap_translate_file)
+
+    stream_transform_file(input_path, output_path, 'upper')
+
+    assert fast_path_results == [None]
+    assert read_text(output_path) == (ASCII_TEXT + "stra\u00dfe\n").upper()
+
+
+# ============================================================================
+# Batch mode
+# ============================================================================
+
+@pytest.fixture
+def input_tree(tmp_path):
+    """A small tree of input files, one of which is not valid UTF-8."""
+    files = {
+        'a.txt': "first file\n",
+        'sub/b.log': "second file\n" * 1000,
+        'sub/deep/c.txt': "third file ΟΔΟΣ\n",
+    }
+    for name, text in files.items():
+        path = tmp_path / 'in' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_text(path, text)
+    (tmp_path / 'in' / 'sub' / 'bad.txt').write_bytes(b"not \xff UTF-8\n")
+    return tmp_path / 'in', files
+
+
+def test_collect_input_files(input_tree):
+    root, _ = input_tree
+
+    files = collect_input_files([str(root / '**' / '*.txt'), str(root / 'sub'), str(root / 'missing.txt')])
+
+    assert files == sorted(str(root / name) for name in ['a.txt', 'sub/b.log', 'sub/bad.txt', 'sub/deep/c.txt'])
+
+
+def test_process_files_in_parallel(input_tree, tmp_path):
+    root, files = input_tree
+    output_dir = tmp_path / 'out'
+
+    summary = process_files_in_parallel(collect_input_files([str(root)]), str(output_dir), 'lower', max_workers=2)
+
+    assert (summary['files'], summary['processed'], summary['failed']) == (4, 3, 1)
+    assert list(summary['errors']) == [str(root / 'sub' / 'bad.txt')]
+    assert summary['errors'][str(root / 'sub' / 'bad.txt')].startswith("UnicodeDecodeError")
+    assert summary['bytes'] == sum(os.path.getsize(root / name) for name in files)
+    for name, text in files.items():
+        assert read_text(output_dir / name) == text.lower()
+    assert not os.path.exists(output_dir / 'sub' / 'bad.txt')
+
+
+def test_process_files_in_parallel_rejects_an_unknown_transform(input_tree, tmp_path):
+    with pytest.raises(ValueError):
+        process_files_in_parallel(collect_input_files([str(input_tree[0])]), str(tmp_path / 'out'), 'reverse')
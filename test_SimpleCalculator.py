@@ -0,0 +1,155 @@
+import asyncio
+import math
+import os
+import socket
+
+import numpy as np
+import pytest
+
+from SimpleCalculator import (MAX_LINE_BYTES, CalculatorService, ExpressionError, calculate,
+                              compile_expression, remove_stale_socket, run_expression)
+
+
+def test_calculate():
+    assert calculate(3, '*', 4) == 12
+    assert calculate(1, '/', 4) == 0.25
+    with pytest.raises(ZeroDivisionError):
+        calculate(1, '/', 0)
+    with pytest.raises(ValueError):
+        calculate(1, '^', 2)
+
+
+# ============================================================================
+# Expression engine
+# ============================================================================
+
+@pytest.mark.parametrize('source', [
+    "__import__('os')", "a.real", "a < b", "'text'", "_secret + 1", "1 +", "True + 1", "[a]",
+])
+def test_rejects_anything_but_arithmetic(source):
+    with pytest.raises(ExpressionError):
+        compile_expression(source)
+
+
+def test_evaluates_with_variables():
+    expression = compile_expression("price * (1 - rate / 100)")
+
+    assert expression.variables == ('price', 'rate')
+    assert expression.evaluate(price=80, rate=25) == 60.0
+    with pytest.raises(ExpressionError, match="Missing value for 'rate'"):
+        expression.evaluate(price=80)
+
+
+def test_division_by_zero_in_each_mode():
+    expression = compile_expression("a / b")
+
+    with pytest.raises(ZeroDivisionError):
+        expression.evaluate(a=1, b=0)
+    assert math.isnan(expression.evaluate_many([{'a': 1, 'b': 0}, {'a': 1, 'b': 2}])[0])
+    np.testing.assert_array_equal(expression.evaluate_arrays(a=[1, 1], b=[0, 2]), [np.nan, 0.5])
+
+
+@pytest.mark.parametrize('source', ["a ** 0.5", "(a ** 0.5) // 1", "a % b", "a // b", "-a ** 2 + b", "a ** b"])
+def test_scalar_and_array_modes_agree(source):
+    a = [-8.0, 4.0, 2.5, 0.5, -1.5]
+    b = [3.0, 0.0, -2.0, 1.0, 0.5]
+    expression = compile_expression(source)
+
+    scalar = expression.evaluate_many([{'a': x, 'b': y} for x, y in zip(a, b)])
+
+    assert all(isinstance(result, float) for result in scalar)
+    np.testing.assert_allclose(scalar, expression.evaluate_arrays(a=a, b=b), equal_nan=True)
+
+
+def test_integer_values_are_evaluated_as_floats():
+    modulo, power = compile_expression("a % b"), compile_expression("a ** b")
+
+    assert repr(modulo.evaluate(a=5, b=3)) == '2.0'
+    assert modulo.evaluate_many([{'a': 7, 'b': 4}]) == [3.0]
+    # A float power overflows instead of building a 400-digit integer
+    with pytest.raises(OverflowError):
+        power.evaluate(a=10, b=400)
+    assert math.isnan(power.evaluate_many([{'a': 10, 'b': 400}])[0])
+    with pytest.raises(ExpressionError, match="must be numbers"):
+        modulo.evaluate(a="five", b=3)
+
+
+def test_negative_root_is_nan_not_complex():
+    assert math.isnan(compile_expression("a ** 0.5").evaluate(a=-8))
+
+
+def test_run_expression_reports_undefined_results(capsys):
+    run_expression("a ** 0.5", ["a=-8,4"])
+
+    assert capsys.readouterr().out.splitlines() == [
+        "a ** 0.5 [a=-8.0] = Error: Undefined result.",
+        "a ** 0.5 [a=4.0] = 2.0",
+    ]
+
+
+def test_run_expression_broadcasts_single_values(capsys):
+    run_expression("a + b", ["a=1,2", "b=10"])
+
+    assert capsys.readouterr().out.splitlines() == ["a + b [a=1.0, b=10.0] = 11.0", "a + b [a=2.0, b=10.0] = 12.0"]
+
+
+def test_run_expression_rejects_var_lists_of_different_lengths():
+    with pytest.raises(ValueError, match="--var b has 2 values"):
+        run_expression("a + b", ["a=1,2,3", "b=1,2"])
+
+
+# ============================================================================
+# Calculator service
+# ============================================================================
+
+def test_service_answers_and_caches():
+    service = CalculatorService(cache_size=2)
+
+    answers = service.answer_batch(["1 + 2", "1 + 2", "3 / 0", "bad"])
+
+    assert answers == ["3.0", "3.0", "error: Cannot divide by zero.", "error: Invalid input. Expected 'num1 op num2'."]
+    stats = service.stats()
+    assert (stats['requests'], stats['cache_hits'], stats['errors'], stats['cache_entries']) == (4, 1, 2, 2)
+
+
+def test_service_closes_a_connection_sending_an_endless_line(tmp_path):
+    path = os.path.join(tmp_path, "calculator.sock")
+
+    async def exchange():
+        server = await asyncio.start_unix_server(CalculatorService().handle_connection, path)
+        async with server:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b"1 + 1\n" + b"9" * (MAX_LINE_BYTES + 1))
+            await writer.drain()
+            received = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return received
+
+    assert asyncio.run(exchange()) == f"2.0\nerror: Request line longer than {MAX_LINE_BYTES} bytes.\n".encode()
+
+
+def test_remove_stale_socket_keeps_other_files(tmp_path):
+    path = os.path.join(tmp_path, "notes.txt")
+    with open(path, 'w') as f:
+        f.write("keep me")
+
+    with pytest.raises(FileExistsError):
+        remove_stale_socket(path)
+
+    with open(path) as f:
+        assert f.read() == "keep me"
+
+
+def test_remove_stale_socket_removes_only_dead_sockets(tmp_path):
+    path = os.path.join(tmp_path, "calculator.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(path)
+        listener.listen()
+        with pytest.raises(FileExistsError):
+            remove_stale_socket(path)
+    # Closed without being unlinked, like after a crash
+    assert os.path.exists(path)
+
+    remove_stale_socket(path)
+
+    assert not os.path.exists(path)
@@ -0,0 +1,95 @@
+import io
+
+import numpy as np
+import pytest
+
+from animalActions import (SPECIES_CLASSES, SPECIES_CODES, Animal, Bird, Fish, Lion, Population, TickScheduler,
+                           random_population)
+
+
+# ============================================================================
+# Slotted animals and populations
+# ============================================================================
+
+def test_animals_have_no_instance_dict():
+    bird = Bird("Polly")
+
+    assert not hasattr(bird, '__dict__')
+    with pytest.raises(AttributeError):
+        bird.color = "green"
+
+
+def test_move_all_writes_the_same_lines_as_move(capsys):
+    animals = [Bird("Polly"), Fish("Nemo"), Lion("Simba"), Animal("Blob"), Fish("Dory"), Bird("Tweety")]
+    for animal in animals:
+        animal.move()
+    expected = capsys.readouterr().out.splitlines()
+    output = io.StringIO()
+
+    written = Population.from_animals(animals).move_all(output)
+
+    lines = output.getvalue().splitlines()
+    assert written == len(animals)
+    assert sorted(lines) == sorted(expected)
+    # Grouped by species, in population order within each species
+    by_species = sorted(range(len(animals)), key=lambda i: SPECIES_CODES[type(animals[i])])
+    assert lines == [expected[i] for i in by_species]
+
+
+def test_move_all_in_several_batches(monkeypatch):
+    monkeypatch.setattr('animalActions.MOVE_BATCH_SIZE', 7)
+    population = random_population(50)
+    output = io.StringIO()
+
+    population.move_all(output)
+
+    assert sorted(output.getvalue().splitlines()) == sorted(
+        SPECIES_CLASSES[code].MOVE_FORMAT.format(name) for name, code in zip(population.names, population.species))
+
+
+def test_population_round_trip():
+    population = Population.from_animals([Bird("Polly"), Lion("Simba")])
+    population.extend(["Nemo", "Dory"], Fish)
+
+    assert len(population) == 4
+    assert [(type(population[i]), population[i].name) for i in range(4)] == [
+        (Bird, "Polly"), (Lion, "Simba"), (Fish, "Nemo"), (Fish, "Dory")]
+    assert population.counts() == {Animal: 0, Bird: 1, Fish: 2, Lion: 1}
+    with pytest.raises(ValueError):
+        Population(["Polly"], [1, 2])
+
+
+# ============================================================================
+# Simulation
+# ============================================================================
+
+def simulate(population, workers, ticks=20):
+    with TickScheduler(population, workers) as scheduler:
+        scheduler.run(ticks)
+        return scheduler.positions(), scheduler.latency_summary()
+
+
+def test_the_number_of_workers_does_not_change_the_result():
+    population = random_population(10_001)
+
+    (x1, y1), summary = simulate(population, workers=1)
+    (x2, y2), _ = simulate(population, workers=2)
+    (x3, y3), _ = simulate(population, workers=3)
+
+    np.testing.assert_array_equal(x1, x2)
+    np.testing.assert_array_equal(y1, y2)
+    np.testing.assert_array_equal(x1, x3)
+    np.testing.assert_array_equal(y1, y3)
+    assert summary['ticks'] == 20
+
+
+def test_animals_move_at_their_species_speed():
+    population = Population.from_animals([Bird("Polly"), Fish("Nemo"), Lion("Simba")])
+
+    with TickScheduler(population, workers=1) as scheduler:
+        start_x, start_y = scheduler.positions()
+        scheduler.step(dt=0.5)
+        x, y = scheduler.positions()
+
+    np.testing.assert_allclose(np.hypot(x - start_x, y - start_y), [6.0, 1.5, 4.0])
+    assert scheduler.tick == 1
@@ -0,0 +1,297 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataVisualizer
+from dataVisualizer import (DENSITY_BINS, IRIS_CACHE_FILE, ColumnStats, IncrementalAnalysis, QuantileSketch,
+                            StreamingSummary, default_group_column, load_iris_frame, lttb_downsample, optimize_dtypes,
+                            prepare_figures, render_figures, summarize_sources)
+
+
+def sensor_frame(rows=20_000, seed=0):
+    """A sensor table, with a few missing readings and no 'species' column."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'sensor': rng.choice(['north', 'south', 'east'], rows),
+        'temperature': rng.normal(20, 5, rows),
+        'humidity': rng.uniform(0, 100, rows),
+    })
+    df.loc[rng.choice(rows, rows // 100, replace=False), 'humidity'] = np.nan
+    return df
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+def test_importing_the_module_loads_no_heavy_libraries():
+    code = "import sys, dataVisualizer; print(' '.join(m for m in dataVisualizer.HEAVY_MODULES if m in sys.modules))"
+
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(dataVisualizer.__file__)))
+
+    assert result.stdout.strip() == ''
+
+
+def test_the_dataset_is_cached_and_reused(tmp_path, monkeypatch):
+    df = load_iris_frame(cache_dir=str(tmp_path))
+
+    assert os.listdir(tmp_path) == [IRIS_CACHE_FILE]
+    assert df.shape == (150, 5)
+    assert isinstance(df['species'].dtype, pd.CategoricalDtype)
+
+    # Once the cache exists, sklearn is no longer needed
+    monkeypatch.setitem(sys.modules, 'sklearn.datasets', None)
+    pd.testing.assert_frame_equal(load_iris_frame(cache_dir=str(tmp_path)), df)
+    with pytest.raises(ImportError):
+        load_iris_frame(cache_dir=str(tmp_path), refresh=True)
+
+
+def test_an_unreadable_cache_is_rebuilt(tmp_path):
+    (tmp_path / IRIS_CACHE_FILE).write_bytes(b"not a feather file")
+
+    df = load_iris_frame(cache_dir=str(tmp_path))
+
+    assert df.shape == (150, 5)
+    pd.testing.assert_frame_equal(pd.read_feather(tmp_path / IRIS_CACHE_FILE), df)
+
+
+def test_optimize_dtypes_keeps_values_and_saves_memory():
+    rng = np.random.default_rng(3)
+    rows = 10_000
+    df = pd.DataFrame({
+        'length': rng.uniform(0, 10, rows).round(1),
+        'count': rng.integers(0, 100, rows),
+        'species': rng.choice(['setosa', 'versicolor', 'virginica'], rows),
+        'label': [f"sample-{number}" for number in range(rows)],
+    })
+    original = df.copy()
+    memory_before = df.memory_usage(deep=True).sum()
+
+    assert optimize_dtypes(df) is df
+
+    assert df.dtypes[['length', 'count', 'species']].astype(str).to_list() == ['float32', 'int8', 'category']
+    # Every label is different, so a category would not save anything
+    assert df['label'].dtype == original['label'].dtype
+    assert df.memory_usage(deep=True).sum() < memory_before / 2
+    np.testing.assert_allclose(df['length'], original['length'], rtol=1e-6)
+    assert (df['count'] == original['count']).all()
+    assert (df['species'].astype(object) == original['species']).all()
+    assert (df['label'] == original['label']).all()
+
+
+# ============================================================================
+# Accumulators
+# ============================================================================
+
+def test_column_stats_match_pandas():
+    values = sensor_frame()['humidity']
+    stats = ColumnStats()
+    for start in range(0, len(values), 3000):
+        stats.update(values.iloc[start:start + 3000].to_numpy())
+
+    assert stats.count == values.count()
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(values.std(), rel=1e-12)
+    assert (stats.minimum, stats.maximum) == (values.min(), values.max())
+
+
+def test_column_stats_merge_like_a_single_pass():
+    values = sensor_frame()['temperature'].to_numpy()
+    whole, left, right = ColumnStats(), ColumnStats(), ColumnStats()
+    whole.update(values)
+    left.update(values[:7000])
+    right.update(values[7000:])
+
+    left.merge(right)
+
+    assert left.count == whole.count
+    assert left.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert left.std == pytest.approx(whole.std, rel=1e-12)
+
+
+def test_quantile_sketch_is_close_to_exact_quantiles():
+    values = np.random.default_rng(1).normal(0, 1, 100_000)
+    sketch = QuantileSketch()
+    for chunk in np.array_split(values, 10):
+        sketch.update(chunk)
+
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.01)
+    assert len(sketch.means) < 1000
+
+
+# ============================================================================
+# Out-of-core analysis
+# ============================================================================
+
+def test_summary_matches_describe_and_groupby():
+    df = sensor_frame()
+
+    summary = summarize_sources([df], 'sensor', chunk_rows=1000)
+
+    expected = df.describe()
+    described = summary.describe()
+    for row in ('count', 'mean', 'std', 'min', 'max'):
+        np.testing.assert_allclose(described.loc[row], expected.loc[row], rtol=1e-10)
+    np.testing.assert_allclose(described.loc[['25%', '50%', '75%']], expected.loc[['25%', '50%', '75%']],
+                               rtol=0.01)
+    pd.testing.assert_frame_equal(summary.group_means(), df.groupby('sensor').mean(), rtol=1e-10)
+
+
+def test_files_and_workers_give_the_same_summary(tmp_path):
+    df = sensor_frame()
+    csv_path = str(tmp_path / 'readings.csv')
+    parquet_path = str(tmp_path / 'readings.parquet')
+    df.to_csv(csv_path, index=False)
+    df.to_parquet(parquet_path, row_group_size=4000)
+
+    expected = summarize_sources([df], 'sensor').group_means()
+    for sources, workers in (([csv_path], 1), ([parquet_path], 2), ([csv_path, parquet_path], 2)):
+        summary = summarize_sources(sources, 'sensor', chunk_rows=3000, max_workers=workers)
+        pd.testing.assert_frame_equal(summary.group_means(), expected, rtol=1e-10)
+
+
+def test_summary_without_grouping():
+    summary = summarize_sources([sensor_frame()], None)
+
+    assert summary.groups == {}
+    assert list(summary.describe().columns) == ['temperature', 'humidity']
+
+
+def test_missing_group_column_is_reported_up_front():
+    with pytest.raises(ValueError, match="no column 'species'"):
+        summarize_sources([sensor_frame()], 'species')
+    summary = StreamingSummary('species')
+    with pytest.raises(ValueError, match="no column 'species'"):
+        summary.update(sensor_frame(100))
+    # The chunk that failed left nothing behind
+    assert summary.columns == {} and summary.groups == {}
+
+
+def test_default_group_column():
+    iris_like = pd.DataFrame({'species': ['setosa'], 'petal length (cm)': [1.4]})
+
+    assert default_group_column([iris_like]) == 'species'
+    assert default_group_column([iris_like, sensor_frame(100)]) is None
+
+
+# ============================================================================
+# Incremental analysis
+# ============================================================================
+
+def test_incremental_analysis_matches_a_full_recompute():
+    df = sensor_frame(5000)
+    analysis = IncrementalAnalysis(trend_column='humidity', group_column='sensor')
+    for start in range(0, len(df), 700):
+        analysis.append(df.iloc[start:start + 700])
+
+    assert len(analysis) == len(df)
+    np.testing.assert_array_equal(analysis.trend_index, np.arange(len(df)))
+    np.testing.assert_allclose(analysis.trend, df['humidity'].expanding().mean(), rtol=1e-12)
+    pd.testing.assert_frame_equal(analysis.group_means(), df.groupby('sensor').mean(), rtol=1e-10)
+    with pytest.raises(ValueError):
+        analysis.trend[0] = 0.0
+
+
+def test_incremental_analysis_accepts_any_index():
+    df = sensor_frame(300)
+    df.index = [f"reading-{number}" for number in range(len(df))]
+    analysis = IncrementalAnalysis(trend_column='temperature', group_column='sensor')
+
+    analysis.append(df.iloc[:100])
+    analysis.append(df.iloc[100:])
+
+    np.testing.assert_array_equal(analysis.trend_index, np.arange(300))
+    np.testing.assert_allclose(analysis.trend, df['temperature'].expanding().mean(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('bad_batch', [
+    lambda df: df.drop(columns='sensor'),
+    lambda df: df.drop(columns='humidity'),
+    lambda df: df.assign(humidity='high'),
+])
+def test_a_rejected_batch_changes_nothing(bad_batch):
+    df = sensor_frame(400)
+    analysis = IncrementalAnalysis(trend_column='humidity', group_column='sensor')
+    analysis.append(df.iloc[:200])
+    trend, group_means = analysis.trend.copy(), analysis.group_means()
+
+    with pytest.raises(ValueError):
+        analysis.append(bad_batch(df.iloc[200:]))
+
+    assert len(analysis) == 200
+    np.testing.assert_array_equal(analysis.trend, trend)
+    pd.testing.assert_frame_equal(analysis.group_means(), group_means)
+    analysis.append(df.iloc[200:])
+    np.testing.assert_allclose(analysis.trend, df['humidity'].expanding().mean(), rtol=1e-12)
+
+
+# ============================================================================
+# Rendering
+# ============================================================================
+
+@pytest.fixture
+def pdf_backend():
+    """Makes 'pdf' the current backend, standing in for the caller's own choice."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    backend = matplotlib.get_backend()
+    plt.switch_backend('pdf')
+    yield
+    plt.switch_backend(backend)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_render_figures_keeps_the_callers_backend(tmp_path, pdf_backend, workers):
+    import matplotlib
+
+    df = load_iris_frame(cache_dir=str(tmp_path / 'cache'))
+    grouped = df.groupby('species', observed=True).mean()
+    rc_before = dict(matplotlib.rcParams)
+
+    paths = render_figures(df, grouped, str(tmp_path / 'charts'), max_workers=workers)
+
+    assert [os.path.basename(path) for path in paths] == [
+        '1_cumulative_mean_trend.png', '2_species_bar.png', '3_petal_width_histogram.png',
+        '4_sepal_petal_scatter.png']
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    assert matplotlib.get_backend() == 'pdf'
+    assert dict(matplotlib.rcParams) == rc_before
+
+
+def test_large_frames_are_reduced_before_drawing():
+    rng = np.random.default_rng(2)
+    rows = 50_000
+    df = pd.DataFrame({
+        'sepal length (cm)': rng.normal(5.8, 0.8, rows),
+        'petal length (cm)': rng.normal(3.8, 1.7, rows),
+        'petal width (cm)': rng.normal(1.2, 0.7, rows),
+        'species': pd.Categorical(rng.choice(['setosa', 'versicolor', 'virginica'], rows)),
+    })
+    grouped = df.groupby('species', observed=True).mean()
+
+    figures = dict(prepare_figures(df, grouped, max_points=1000))
+
+    assert len(figures['cumulative_mean_trend']['x']) == 1000
+    assert figures['petal_width_histogram']['counts'].sum() == rows
+    assert figures['sepal_petal_scatter']['counts'].shape == (DENSITY_BINS, DENSITY_BINS)
+
+
+def test_lttb_keeps_the_ends_and_the_peak():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 50.0
+
+    sampled_x, sampled_y = lttb_downsample(x, y, 200)
+
+    assert len(sampled_x) == 200
+    assert (sampled_x[0], sampled_x[-1]) == (0.0, 9999.0)
+    assert 50.0 in sampled_y
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from digitalDevice import (JOURNAL_FILENAME, DeviceRegistry, DigitalDevice, FleetStore, Smartphone,
+                           apply_workload_step, fleet_state, fleet_workload, pack_string, unpack_string)
+
+
+# ============================================================================
+# Smartphones and the registry
+# ============================================================================
+
+def test_apps_keep_install_order_and_are_read_only():
+    phone = Smartphone("Google", "Pixel 8", "555-0100")
+    phone.install_apps(["Maps", "Mail", "Maps", "Camera"])
+    phone.uninstall_apps(["Mail"])
+
+    assert phone.apps == ("Maps", "Camera")
+    assert phone.has_app("Camera") and not phone.has_app("Mail")
+    with pytest.raises(AttributeError):
+        phone.apps.append("Notes")
+
+
+def test_registry_indexes_follow_changes():
+    registry = DeviceRegistry()
+    pixel = Smartphone("Google", "Pixel 8", "555-0100")
+    galaxy = Smartphone("Samsung", "Galaxy S24", "555-0101")
+    tablet = DigitalDevice("Samsung", "Galaxy Tab S9")
+    pixel_id, galaxy_id, tablet_id = registry.register_many([pixel, galaxy, tablet])
+
+    result = registry.power_on(registry.query(brand="Samsung"))
+    registry.install_app([pixel_id, galaxy_id, tablet_id], "Maps")
+    pixel.power_on()  # Changed directly, not through the registry
+
+    assert result.changed == [galaxy_id, tablet_id]
+    assert registry.query(is_on=True) == {pixel_id, galaxy_id, tablet_id}
+    assert registry.query(brand="Samsung", app_name="Maps") == {galaxy_id}
+    assert registry.query(phone_number="555-0100") == {pixel_id}
+
+
+# ============================================================================
+# FleetStore: journal, snapshots and recovery
+# ============================================================================
+
+def test_pack_string_round_trip():
+    data = b"xx" + pack_string("Café ☕") + pack_string("")
+
+    text, offset = unpack_string(data, 2)
+    empty, end = unpack_string(data, offset)
+
+    assert (text, empty, end) == ("Café ☕", "", len(data))
+
+
+def run_workload(directory, operations, snapshot_every=None, seed=0):
+    """Applies fleet_workload through a store; without `snapshot_every`, all of it goes to the journal."""
+    with FleetStore(directory, snapshot_every=snapshot_every or 10 ** 9, sync=False) as store:
+        for step in fleet_workload(seed, operations):
+            apply_workload_step(store.registry, step, store if snapshot_every else None)
+        return fleet_state(store.registry)
+
+
+def test_journaled_changes_survive_a_restart(tmp_path):
+    state = run_workload(tmp_path, 300)
+
+    store = FleetStore(tmp_path, sync=False)
+
+    assert fleet_state(store.registry) == state
+    assert store.recovery['snapshot_devices'] == 0
+    assert store.recovery['replayed_records'] > 0
+    assert store.recovery['truncated_bytes'] == 0
+    store.close()
+
+
+def test_recovery_combines_the_snapshot_and_the_journal(tmp_path):
+    state = run_workload(tmp_path, 2000, snapshot_every=250)
+
+    with FleetStore(tmp_path, sync=False) as store:
+        assert fleet_state(store.registry) == state
+        assert store.recovery['snapshot_devices'] > 0
+        assert store.recovery['replayed_records'] < 250
+
+
+def test_a_torn_record_at_the_end_is_cut_off(tmp_path):
+    with FleetStore(tmp_path, sync=False) as store:
+        registry = store.registry
+        phone_id = registry.register(Smartphone("Google", "Pixel 8", "555-0100"))
+        registry.install_app([phone_id], "Maps")
+        state = fleet_state(registry)
+        registry.power_on([phone_id])
+    journal_path = os.path.join(tmp_path, JOURNAL_FILENAME)
+    # Lose the end of the last record, as a crash in the middle of a write would
+    os.truncate(journal_path, os.path.getsize(journal_path) - 3)
+
+    with FleetStore(tmp_path, sync=False) as store:
+        assert fleet_state(store.registry) == state
+        assert store.recovery['truncated_bytes'] > 0
+        # New records go after the last intact one
+        store.registry.power_on([phone_id])
+        state = fleet_state(store.registry)
+
+    with FleetStore(tmp_path, sync=False) as store:
+        assert fleet_state(store.registry) == state
+        assert store.recovery['truncated_bytes'] == 0
+
+
+def test_a_corrupt_record_is_not_replayed(tmp_path):
+    with FleetStore(tmp_path, sync=False) as store:
+        phone_id = store.registry.register(Smartphone("Google", "Pixel 8", "555-0100"))
+        state = fleet_state(store.registry)
+        store.registry.install_app([phone_id], "Maps")
+    journal_path = os.path.join(tmp_path, JOURNAL_FILENAME)
+    with open(journal_path, 'r+b') as journal:
+        journal.seek(-1, os.SEEK_END)
+        last_byte = journal.read(1)
+        journal.seek(-1, os.SEEK_END)
+        journal.write(bytes([last_byte[0] ^ 0xFF]))
+
+    with FleetStore(tmp_path, sync=False) as store:
+        assert fleet_state(store.registry) == state
+
+
+def test_close_syncs_the_journal(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    store = FleetStore(tmp_path)
+    store.registry.register(Smartphone("Google", "Pixel 8", "555-0100"))
+    journal_fd = store._journal.fileno()
+    synced.clear()
+
+    store.close()
+
+    assert synced == [journal_fd]
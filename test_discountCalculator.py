@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from discountCalculator import calculate_discount, calculate_discounts, exact_final_price, price_file
+
+
+def test_discount_threshold():
+    assert calculate_discount(100, 20) == 80
+    assert calculate_discount(100, 19.9) == 100
+
+
+def test_vectorized_pricing_matches_the_scalar_rule():
+    rng = np.random.default_rng(0)
+    prices = rng.uniform(0.5, 500, 10_000).round(2)
+    discounts = rng.integers(0, 60, 10_000).astype(float)
+
+    expected = [calculate_discount(price, discount) for price, discount in zip(prices, discounts)]
+
+    np.testing.assert_array_equal(calculate_discounts(prices, discounts), expected)
+
+
+@pytest.mark.parametrize('price, discount, expected', [
+    (1.15, 30, 0.81),  # 0.805 exactly, 0.8049999999999999 as a float
+    (2.01, 50, 1.01),
+    (4.35, 50, 2.18),
+    (10, 10, 10.0),
+])
+def test_exact_final_price_rounds_half_cents_up(price, discount, expected):
+    assert exact_final_price(price, discount) == expected
+    assert calculate_discounts([price], discount, decimals=2)[0] == expected
+
+
+def test_exact_final_price_passes_non_finite_values_through():
+    assert exact_final_price(math.inf, 10) == math.inf
+    assert math.isnan(exact_final_price(math.nan, 50))
+    assert exact_final_price(5, math.nan) == 5
+
+
+def write_price_list(path, rows=12_000):
+    # Whole numbers in the first chunks, decimals later: pandas infers int64
+    # for the first chunks and float64 for the rest
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("item,price,discount\n")
+        for number in range(rows):
+            if number < rows // 2:
+                f.write(f"item{number},10,20\n")
+            else:
+                f.write(f"item{number},12.5,1.5\n")
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.parquet'])
+@pytest.mark.parametrize('workers', [1, 3])
+def test_price_file_handles_type_changes_between_chunks(tmp_path, extension, workers):
+    input_path = str(tmp_path / 'prices.csv')
+    output_path = str(tmp_path / f'priced{extension}')
+    write_price_list(input_path)
+
+    stats = price_file(input_path, output_path, chunk_rows=5000, workers=workers)
+
+    priced = pd.read_csv(output_path) if extension == '.csv' else pd.read_parquet(output_path)
+    assert stats['rows'] == len(priced) == 12_000
+    assert list(priced.columns) == ['item', 'price', 'discount', 'final_price']
+    assert priced['final_price'].tolist() == [8.0] * 6000 + [12.5] * 6000
@@ -0,0 +1,202 @@
+import json
+import threading
+
+import pytest
+
+import eventBus
+from animalActions import Bird, Fish
+from eventBus import Event, EventBus, EventSink, JsonLinesSink, MemorySink, emit, set_event_bus
+
+
+class GatedSink(EventSink):
+    """Holds up the bus thread in write_batch until `gate` is set."""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.events = []
+
+    def write_batch(self, events):
+        self.entered.set()
+        self.gate.wait(5)
+        self.events.extend(events)
+
+
+def event(number):
+    return Event('test', str(number), {}, 0.0)
+
+
+@pytest.fixture
+def installed_bus():
+    """Installs a bus with a MemorySink for emit(), and removes it afterwards."""
+    sink = MemorySink()
+    bus = EventBus([sink])
+    set_event_bus(bus)
+    yield bus, sink
+    set_event_bus(None)
+    bus.close()
+
+
+def test_emit_prints_without_a_bus(capsys):
+    assert eventBus.get_event_bus() is None
+
+    Bird("Polly").move()
+
+    assert capsys.readouterr().out == "Polly the bird is Flying 🐦...\n"
+
+
+def test_emit_goes_to_the_installed_bus(installed_bus, capsys):
+    bus, sink = installed_bus
+
+    Fish("Nemo").move()
+    emit('device.power_on', "Pixel is now ON.", brand="Google")
+    bus.flush()
+
+    assert capsys.readouterr().out == ""
+    assert [(e.type, e.message, e.data) for e in sink.events] == [
+        ('animal.move', "Nemo the fish is Swimming 🐠...", {'name': "Nemo", 'species': "Fish"}),
+        ('device.power_on', "Pixel is now ON.", {'brand': "Google"}),
+    ]
+
+
+def test_events_are_delivered_in_order_and_in_batches():
+    sink = MemorySink()
+    with EventBus([sink], batch_size=10) as bus:
+        for number in range(95):
+            bus.emit(event(number))
+
+    assert [e.message for e in sink.events] == [str(number) for number in range(95)]
+    stats = bus.stats()
+    assert (stats['emitted'], stats['delivered'], stats['queued']) == (95, 95, 0)
+    assert stats['batches'] >= 10
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    with EventBus([JsonLinesSink(str(path))]) as bus:
+        bus.emit(Event('phone.call', "Dialing Mom...", {'contact': "Mom"}, 12.5))
+
+    assert json.loads(path.read_text(encoding='utf-8')) == {
+        'type': 'phone.call', 'time': 12.5, 'message': "Dialing Mom...", 'contact': "Mom"}
+
+
+@pytest.mark.parametrize('overflow, kept', [
+    ('drop_newest', range(1, 6)),
+    ('drop_oldest', range(6, 11)),
+    ('block', range(1, 6)),
+])
+def test_overflow_policies(overflow, kept):
+    sink = GatedSink()
+    bus = EventBus([sink], max_queue=5, batch_size=1, overflow=overflow, block_timeout=0.01)
+    bus.emit(event(0))
+    assert sink.entered.wait(5)  # The bus thread is now stuck delivering event 0
+
+    results = [bus.emit(event(number)) for number in range(1, 11)]
+    sink.gate.set()
+    bus.close()
+
+    assert [e.message for e in sink.events] == ['0'] + [str(number) for number in kept]
+    assert bus.stats()['dropped'] == 5
+    assert results.count(False) == (0 if overflow == 'drop_oldest' else 5)
+
+
+def test_concurrent_emitters_keep_the_counts_consistent():
+    sink = MemorySink()
+    bus = EventBus([sink], max_queue=100, batch_size=10)
+    queue_lengths = []
+
+    def emit_many():
+        lengths = []
+        for number in range(5000):
+            bus.emit(event(number))
+            lengths.append(len(bus._queue))
+        queue_lengths.append(max(lengths))
+
+    threads = [threading.Thread(target=emit_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    bus.close()
+
+    stats = bus.stats()
+    assert max(queue_lengths) <= 100
+    assert stats['emitted'] + stats['dropped'] == 8 * 5000
+    assert stats['delivered'] == stats['emitted'] == len(sink.events)
+
+
+def test_a_failing_sink_does_not_stop_the_others():
+    class FailingSink(EventSink):
+        def write_batch(self, events):
+            raise OSError("disk full")
+
+    sink = MemorySink()
+    with EventBus([FailingSink(), sink], batch_size=2) as bus:
+        for number in range(4):
+            bus.emit(event(number))
+
+    assert len(sink.events) == 4
+    assert bus.stats()['sink_errors'] >= 1
+
+
+def test_closing_from_a_sink_does_not_deadlock():
+    class ClosingSink(MemorySink):
+        closed = False
+
+        def write_batch(self, events):
+            super().write_batch(events)
+            bus.close()
+
+        def close(self):
+            self.closed = True
+
+    sink = ClosingSink()
+    bus = EventBus([sink])
+    bus.emit(event(0))
+    bus.flush(timeout=5)
+
+    bus._thread.join(5)
+    assert not bus._thread.is_alive()
+    assert sink.closed and len(sink.events) == 1
+    assert bus.emit(event(1)) is False
+
+
+def test_a_sink_that_fails_to_close_does_not_keep_the_others_open():
+    class FailingSink(MemorySink):
+        def close(self):
+            raise OSError("disk full")
+
+    class RecordingSink(MemorySink):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    sink = RecordingSink()
+    bus = EventBus([FailingSink(), sink])
+    bus.close()
+
+    assert sink.closed
+    assert bus.stats()['sink_errors'] == 1
+
+
+def test_flush_racing_close_neither_fails_nor_hangs(monkeypatch):
+    sink = MemorySink()
+    bus = EventBus([sink])
+    bus.emit(event(0))
+    closer = threading.Thread(target=bus.close)
+    run_coroutine_threadsafe = eventBus.asyncio.run_coroutine_threadsafe
+
+    def close_first(coroutine, loop):
+        # close() runs as far as it can before flush() hands over its delivery
+        closer.start()
+        closer.join(0.2)
+        return run_coroutine_threadsafe(coroutine, loop)
+
+    monkeypatch.setattr(eventBus.asyncio, 'run_coroutine_threadsafe', close_first)
+
+    bus.flush(timeout=5)
+    closer.join(5)
+
+    assert not closer.is_alive()
+    assert len(sink.events) == 1
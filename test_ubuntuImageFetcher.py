@@ -0,0 +1,492 @@
+import os
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import ubuntuImageFetcher
+from ubuntuImageFetcher import (MAX_FILE_SIZE_BYTES, STATUS_FAILED, STATUS_FETCHED, STATUS_REJECTED,
+                                STATUS_SKIPPED, STATUS_UNCHANGED, FetchIndex, RetryableStatusError, download_image,
+                                fetch_and_save_image, fetch_images_concurrently, partial_path_for, url_key)
+
+IMAGE = b'\x89PNG\r\n\x1a\n' + random.Random(0).randbytes(300 * 1024)
+ETAG = '"image-v1"'
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Serves IMAGE, misbehaving as told by the server's `script`: one action per
+    request, then 'ok' for every request after the script runs out.
+
+    'ok'    sends the image (or the requested range of it)
+    'drop'  sends the headers and half of the body, then closes the connection
+    '429'   answers 429 Too Many Requests
+    '503'   answers 503 Service Unavailable
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            action = server.script.pop(0) if server.script else 'ok'
+            server.requests.append(dict(self.headers))
+
+        if action in ('429', '503'):
+            self.send_response(int(action))
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range', ETAG) == ETAG:
+            start = int(range_header.removeprefix('bytes=').rstrip('-'))
+            if start >= len(IMAGE):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(IMAGE)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(IMAGE) - 1}/{len(IMAGE)}")
+        else:
+            self.send_response(200)
+        body = IMAGE[start:]
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+
+        if action == 'drop':
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        # Counted before writing, so the count is complete by the time the
+        # client has read the body
+        with server.lock:
+            server.bytes_sent += len(body)
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server(monkeypatch):
+    """A local server running FlakyHandler. Set `.script` before the first request."""
+    monkeypatch.setattr(ubuntuImageFetcher, 'BACKOFF_BASE_SECONDS', 0)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.lock = threading.Lock()
+    server.script = []
+    server.requests = []
+    server.bytes_sent = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/image.png"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def download(server, directory, max_retries=3):
+    filepath = os.path.join(directory, 'image.png')
+    with requests.Session() as session:
+        hasher, _ = download_image(session, server.url, {}, filepath, max_retries=max_retries)
+    with open(filepath, 'rb') as f:
+        return f.read(), hasher
+
+
+def test_resumes_a_dropped_download_with_a_range_request(flaky_server, tmp_path, capsys):
+    flaky_server.script = ['drop']
+
+    content, hasher = download(flaky_server, tmp_path)
+
+    assert content == IMAGE
+    assert hasher.digest() == hashlib.sha256(IMAGE).digest()
+    assert capsys.readouterr().out.count("↻ Retrying") == 1
+    first, second = flaky_server.requests
+    assert 'Range' not in first
+    resumed_from = int(second['Range'].removeprefix('bytes=').rstrip('-'))
+    assert 0 < resumed_from < len(IMAGE)
+    assert second['If-Range'] == ETAG
+    # Only the missing bytes were sent again
+    assert flaky_server.bytes_sent == len(IMAGE) // 2 + len(IMAGE) - resumed_from
+    assert os.listdir(tmp_path) == ['image.png']
+
+
+def test_retries_429_and_503(flaky_server, tmp_path, capsys):
+    flaky_server.script = ['429', '503', 'drop', '503']
+
+    content, _ = download(flaky_server, tmp_path, max_retries=4)
+
+    assert content == IMAGE
+    assert len(flaky_server.requests) == 5
+    assert capsys.readouterr().out.count("↻ Retrying") == 4
+
+
+def test_gives_up_after_max_retries(flaky_server, tmp_path):
+    flaky_server.script = ['503'] * 10
+
+    with pytest.raises(RetryableStatusError):
+        download(flaky_server, tmp_path, max_retries=2)
+
+    assert len(flaky_server.requests) == 3
+
+
+def test_resumes_a_partial_file_from_an_earlier_run(flaky_server, tmp_path):
+    partial_path = partial_path_for(os.path.join(tmp_path, 'image.png'), flaky_server.url)
+    with open(partial_path, 'wb') as f:
+        f.write(IMAGE[:1000])
+    with open(partial_path + '.validator', 'w', encoding='utf-8') as f:
+        f.write(ETAG)
+
+    content, _ = download(flaky_server, tmp_path)
+
+    assert content == IMAGE
+    assert flaky_server.requests[0]['Range'] == 'bytes=1000-'
+    assert flaky_server.bytes_sent == len(IMAGE) - 1000
+    assert os.listdir(tmp_path) == ['image.png']
+
+
+def test_starts_over_when_the_range_is_not_satisfiable(flaky_server, tmp_path, capsys):
+    # A complete partial file: the Range asks for the bytes after the end
+    partial_path = partial_path_for(os.path.join(tmp_path, 'image.png'), flaky_server.url)
+    with open(partial_path, 'wb') as f:
+        f.write(IMAGE)
+    with open(partial_path + '.validator', 'w', encoding='utf-8') as f:
+        f.write(ETAG)
+
+    content, _ = download(flaky_server, tmp_path)
+
+    assert content == IMAGE
+    first, second = flaky_server.requests
+    assert first['Range'] == f"bytes={len(IMAGE)}-"
+    assert 'Range' not in second
+    assert capsys.readouterr().out.count("↻ Retrying") == 0
+    assert os.listdir(tmp_path) == ['image.png']
+
+
+# ============================================================================
+# Batch fetching against local sites
+# ============================================================================
+
+def png(name):
+    """A small PNG-looking body that is different for every name."""
+    return b'\x89PNG\r\n\x1a\n' + hashlib.sha256(name.encode()).digest() * 64
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves the server's `files`, a dict of path (with the query string) to a
+    (content_type, body) pair. Unknown paths get a 404. Every body has an
+    ETag, and a matching If-None-Match gets a 304, as does every request
+    for a path in `not_modified`. `last_modified`, if set, is sent with
+    every response. Each request takes
+    `delay` seconds. Requests are logged in `requests` as (method, path,
+    headers, arrival time), and the most that were in flight at once is
+    kept in `max_active`. Paths in `unsized` are sent without a
+    Content-Length, and the body bytes that reached the client before it
+    hung up are counted in `bytes_sent`.
+    """
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, dict(self.headers), time.perf_counter()))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if self.path not in server.files:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            content_type, body = server.files[self.path]
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag or self.path in server.not_modified:
+                self.send_response(304)
+                self.send_validators(etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            if self.path not in server.unsized:
+                self.send_header('Content-Length', str(len(body)))
+            self.send_validators(etag)
+            self.end_headers()
+            if send_body:
+                self.write_body(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def send_validators(self, etag):
+        self.send_header('ETag', etag)
+        if self.server.last_modified:
+            self.send_header('Last-Modified', self.server.last_modified)
+
+    def write_body(self, body, chunk_size=64 * 1024):
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start:start + chunk_size]
+            try:
+                self.wfile.write(chunk)
+            except ConnectionError:
+                self.close_connection = True
+                return
+            with self.server.lock:
+                self.server.bytes_sent += len(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def make_site():
+    """Starts local SiteHandler servers; each one counts as a separate host."""
+    servers = []
+
+    def start(files=(), delay=0.0, unsized=(), not_modified=()):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+        server.lock = threading.Lock()
+        server.files = dict(files)
+        server.delay = delay
+        server.unsized = set(unsized)
+        server.not_modified = set(not_modified)
+        server.last_modified = None
+        server.bytes_sent = 0
+        server.requests = []
+        server.active = server.max_active = 0
+        server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def wait_until_idle(server, timeout=5):
+    """Waits for the server to finish handling every request."""
+    deadline = time.monotonic() + timeout
+    while server.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.active == 0
+
+
+def test_batch_summary(make_site, tmp_path, capsys):
+    first = make_site({f'/{n}.png': ('image/png', png(str(n))) for n in range(5)})
+    second = make_site({'/photo.png': ('image/png', png('photo')),
+                        '/page.png': ('text/html', b'<html></html>')})
+    urls = [first.base_url + f'/{n}.png' for n in range(5)] + [
+        first.base_url + '/0.png',  # Duplicate
+        second.base_url + '/photo.png',
+        second.base_url + '/page.png',
+        second.base_url + '/missing.png',
+    ]
+
+    summary = fetch_images_concurrently(urls, max_workers=4, output_dir=str(tmp_path))
+
+    assert (summary['total'], summary['duplicates']) == (8, 1)
+    assert (summary[STATUS_FETCHED], summary[STATUS_REJECTED], summary[STATUS_FAILED]) == (6, 1, 1)
+    assert summary['hosts'] == {
+        first.base_url.removeprefix('http://'): {STATUS_FETCHED: 5},
+        second.base_url.removeprefix('http://'): {STATUS_FETCHED: 1, STATUS_REJECTED: 1, STATUS_FAILED: 1},
+    }
+    assert summary['failed_urls'] == [second.base_url + '/missing.png']
+    with open(tmp_path / '3.png', 'rb') as f:
+        assert f.read() == png('3')
+
+
+def test_per_host_limit(make_site, tmp_path):
+    site = make_site({f'/{n}.png': ('image/png', png(str(n))) for n in range(12)}, delay=0.05)
+
+    summary = fetch_images_concurrently([site.base_url + f'/{n}.png' for n in range(12)],
+                                        max_workers=8, per_host_limit=3, output_dir=str(tmp_path))
+
+    assert summary[STATUS_FETCHED] == 12
+    assert site.max_active <= 3
+
+
+def test_a_busy_host_does_not_hold_up_the_others(make_site, tmp_path):
+    busy = make_site({f'/{n}.png': ('image/png', png(str(n))) for n in range(8)}, delay=0.1)
+    quiet = make_site({'/photo.png': ('image/png', png('photo'))})
+    urls = [busy.base_url + f'/{n}.png' for n in range(8)] + [quiet.base_url + '/photo.png']
+
+    summary = fetch_images_concurrently(urls, max_workers=4, per_host_limit=2, output_dir=str(tmp_path))
+
+    assert summary[STATUS_FETCHED] == 9
+    # The quiet host was asked before the busy host had a free slot for its
+    # third URL, not after the busy host's whole list had drained
+    busy_heads = [request for request in busy.requests if request[0] == 'HEAD']
+    assert quiet.requests[0][3] < busy_heads[2][3]
+
+
+def test_extension_less_urls_get_distinct_names(make_site, tmp_path):
+    site = make_site({f'/image?id={n}': ('image/jpeg', png(str(n))) for n in range(20)})
+    urls = [site.base_url + f'/image?id={n}' for n in range(20)]
+
+    summary = fetch_images_concurrently(urls, max_workers=8, per_host_limit=8, output_dir=str(tmp_path))
+
+    assert summary[STATUS_FETCHED] == 20
+    assert sorted(os.listdir(tmp_path)) == sorted(f"downloaded_image_{url_key(url)}.jpeg" for url in urls)
+    with open(tmp_path / f"downloaded_image_{url_key(urls[7])}.jpeg", 'rb') as f:
+        assert f.read() == png('7')
+
+
+# ============================================================================
+# Size limit
+# ============================================================================
+
+def test_a_declared_size_over_the_limit_is_rejected_before_the_download(make_site, tmp_path, capsys):
+    site = make_site({'/huge.png': ('image/png', png('huge') + bytes(MAX_FILE_SIZE_BYTES))})
+
+    status = fetch_and_save_image(site.base_url + '/huge.png', set(), output_dir=str(tmp_path))
+
+    assert status == STATUS_REJECTED
+    assert "exceeds the 10MB limit" in capsys.readouterr().out
+    assert [request[0] for request in site.requests] == ['HEAD']
+    assert os.listdir(tmp_path) == []
+
+
+def test_an_undeclared_size_over_the_limit_is_cut_off_mid_stream(make_site, tmp_path, capsys):
+    body = png('huge') + bytes(4 * MAX_FILE_SIZE_BYTES)
+    site = make_site({'/huge.png': ('image/png', body)}, unsized=['/huge.png'])
+
+    status = fetch_and_save_image(site.base_url + '/huge.png', set(), output_dir=str(tmp_path))
+
+    assert status == STATUS_REJECTED
+    assert "exceeded the size limit" in capsys.readouterr().out
+    # No partial or temporary file is left behind
+    assert os.listdir(tmp_path) == []
+    # The client hung up instead of reading the rest of the body
+    wait_until_idle(site)
+    assert site.bytes_sent < len(body)
+
+
+# ============================================================================
+# Fetch index
+# ============================================================================
+
+@pytest.fixture
+def index(tmp_path):
+    with FetchIndex.for_directory(str(tmp_path)) as index:
+        yield index
+
+
+def test_the_index_skips_urls_saved_by_an_earlier_run(make_site, tmp_path, index):
+    site = make_site({'/photo.png': ('image/png', png('photo'))})
+    url = site.base_url + '/photo.png'
+    assert fetch_and_save_image(url, set(), output_dir=str(tmp_path), index=index) == STATUS_FETCHED
+    requests_made = len(site.requests)
+
+    # A new run starts with an empty set of fetched URLs
+    status = fetch_and_save_image(url, set(), output_dir=str(tmp_path), index=index)
+
+    assert status == STATUS_SKIPPED
+    assert len(site.requests) == requests_made
+    assert index.lookup_url(url) == (hashlib.sha256(png('photo')).hexdigest(), os.path.join(tmp_path, 'photo.png'))
+
+
+def test_identical_content_is_stored_once(make_site, tmp_path, index):
+    site = make_site({'/photo.png': ('image/png', png('photo')),
+                      '/copy.png': ('image/png', png('photo')),
+                      '/other.png': ('image/png', png('other'))})
+
+    for name in ('photo', 'copy', 'other'):
+        status = fetch_and_save_image(site.base_url + f'/{name}.png', set(), output_dir=str(tmp_path), index=index)
+        assert status == STATUS_FETCHED
+
+    assert os.path.samefile(tmp_path / 'photo.png', tmp_path / 'copy.png')
+    assert not os.path.samefile(tmp_path / 'photo.png', tmp_path / 'other.png')
+    with open(tmp_path / 'copy.png', 'rb') as f:
+        assert f.read() == png('photo')
+
+
+# ============================================================================
+# Conditional refresh
+# ============================================================================
+
+def test_refresh_keeps_an_unchanged_file_and_updates_its_validators(make_site, tmp_path, index):
+    site = make_site({'/photo.png': ('image/png', png('photo'))})
+    url = site.base_url + '/photo.png'
+    fetch_and_save_image(url, set(), output_dir=str(tmp_path), index=index)
+    etag, last_modified = index.get_validators(url)
+    inode = os.stat(tmp_path / 'photo.png').st_ino
+    site.last_modified = 'Wed, 21 Oct 2026 07:28:00 GMT'
+    del site.requests[:]
+
+    status = fetch_and_save_image(url, set(), output_dir=str(tmp_path), index=index, refresh=True)
+
+    assert status == STATUS_UNCHANGED
+    assert last_modified is None
+    assert [(method, headers['If-None-Match']) for method, _, headers, _ in site.requests] == [('HEAD', etag)]
+    assert os.stat(tmp_path / 'photo.png').st_ino == inode
+    assert index.get_validators(url) == (etag, 'Wed, 21 Oct 2026 07:28:00 GMT')
+
+
+def test_refresh_replaces_a_changed_file(make_site, tmp_path, index):
+    site = make_site({'/photo.png': ('image/png', png('photo'))})
+    url = site.base_url + '/photo.png'
+    fetch_and_save_image(url, set(), output_dir=str(tmp_path), index=index)
+    site.files['/photo.png'] = ('image/png', png('new photo'))
+
+    status = fetch_and_save_image(url, set(), output_dir=str(tmp_path), index=index, refresh=True)
+
+    assert status == STATUS_FETCHED
+    with open(tmp_path / 'photo.png', 'rb') as f:
+        assert f.read() == png('new photo')
+    assert index.lookup_url(url)[0] == hashlib.sha256(png('new photo')).hexdigest()
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+def test_an_unrequested_304_is_a_failure(make_site, tmp_path, index, capsys, use_index):
+    site = make_site({'/photo.png': ('image/png', png('photo'))}, not_modified=['/photo.png'])
+
+    status = fetch_and_save_image(site.base_url + '/photo.png', set(), output_dir=str(tmp_path),
+                                  index=index if use_index else None, refresh=True)
+
+    assert status == STATUS_FAILED
+    assert "Unexpected 304 Not Modified" in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / 'photo.png')
+
+
+# ============================================================================
+# Single-request mode
+# ============================================================================
+
+def test_single_request_mode_fetches_with_one_get(make_site, tmp_path):
+    site = make_site({'/photo.png': ('application/octet-stream', png('photo'))})
+
+    status = fetch_and_save_image(site.base_url + '/photo.png', set(), output_dir=str(tmp_path),
+                                  single_request=True)
+
+    assert status == STATUS_FETCHED
+    assert [request[0] for request in site.requests] == ['GET']
+    with open(tmp_path / 'photo.png', 'rb') as f:
+        assert f.read() == png('photo')
+
+
+def test_single_request_mode_rejects_a_non_image_before_reading_the_body(make_site, tmp_path, capsys):
+    body = b'MZ' + bytes(4 * MAX_FILE_SIZE_BYTES)
+    site = make_site({'/photo.png': ('application/octet-stream', body)}, unsized=['/photo.png'])
+
+    status = fetch_and_save_image(site.base_url + '/photo.png', set(), output_dir=str(tmp_path),
+                                  single_request=True)
+
+    assert status == STATUS_REJECTED
+    assert "does not contain a supported image format" in capsys.readouterr().out
+    assert [request[0] for request in site.requests] == ['GET']
+    assert os.listdir(tmp_path) == []
+    wait_until_idle(site)
+    assert site.bytes_sent < len(body)
@@ -2,13 +2,532 @@ import requests
 import os
 from urllib.parse import urlparse
 import sys
+import argparse
+import threading
+import time
+import uuid
+import hashlib
+import sqlite3
+import itertools
+import random
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 
 # Define constants for file management and safety
 MAX_FILE_SIZE_MB = 10
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+CHUNK_SIZE = 64 * 1024  # Bytes written to disk per chunk when streaming
 SUPPORTED_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif']
+# Leading "magic" bytes of each supported format, used to sniff the real type
+IMAGE_SIGNATURES = {
+    b'\xff\xd8\xff': '.jpeg',
+    b'\x89PNG\r\n\x1a\n': '.png',
+    b'GIF87a': '.gif',
+    b'GIF89a': '.gif',
+}
+MAGIC_BYTES_LENGTH = max(len(signature) for signature in IMAGE_SIGNATURES)
+GENERIC_CONTENT_TYPES = ['', 'application/octet-stream', 'binary/octet-stream']
 USER_AGENT = "Ubuntu Image Fetcher/1.0 (Python requests library)"
+OUTPUT_DIR = "Fetched_Images"
+INDEX_FILENAME = ".fetch_index.sqlite3"  # Persistent fetch index inside OUTPUT_DIR
 
-def fetch_and_save_image(url, fetched_urls):
+# Eviction policy for cached ETag/Last-Modified validators
+DEFAULT_VALIDATOR_MAX_ENTRIES = 100_000
+DEFAULT_VALIDATOR_MAX_AGE_DAYS = 30
+
+# Retry policy for transient errors: exponential backoff with full jitter
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Defaults for the concurrent batch mode
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+
+# Status values returned by fetch_and_save_image, used for the batch report
+STATUS_FETCHED = "fetched"
+STATUS_SKIPPED = "skipped"
+STATUS_UNCHANGED = "unchanged"
+STATUS_REJECTED = "rejected"
+STATUS_FAILED = "failed"
+
+
+class FileTooLargeError(Exception):
+    """Raised when a streamed download grows past MAX_FILE_SIZE_MB."""
+
+
+class RetryableStatusError(requests.exceptions.HTTPError):
+    """Raised for a 429 or 5xx response, which is worth retrying later."""
+
+    def __init__(self, message, response=None, retry_after=None):
+        super().__init__(message, response=response)
+        self.retry_after = retry_after
+
+
+# Errors that may go away on their own and are therefore retried
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    RetryableStatusError,
+)
+
+
+def is_supported_content_type(content_type):
+    """
+    Checks a Content-Type header against SUPPORTED_EXTENSIONS.
+
+    The subtype is compared as an extension, so 'image/jpeg' matches '.jpeg'
+    and 'image/png; charset=binary' matches '.png'.
+    """
+    mime_type = content_type.split(';')[0].strip().lower()
+    main_type, _, subtype = mime_type.partition('/')
+    return main_type == 'image' and f".{subtype}" in SUPPORTED_EXTENSIONS
+
+def is_generic_content_type(content_type):
+    """Returns True if a Content-Type says nothing about the image format."""
+    return content_type.split(';')[0].strip().lower() in GENERIC_CONTENT_TYPES
+
+def sniff_image_type(data):
+    """
+    Identifies a supported image format from its leading bytes.
+
+    Args:
+        data (bytes): The first bytes of the content.
+
+    Returns:
+        str or None: The matching extension (e.g. '.png'), or None.
+    """
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if data.startswith(signature):
+            return extension
+    return None
+
+def parse_content_length(headers):
+    """
+    Reads the Content-Length header.
+
+    Args:
+        headers (Mapping): The response headers.
+
+    Returns:
+        int or None: The declared size in bytes, or None if the header is
+                     missing or malformed (the size is then unknown, not 0).
+    """
+    try:
+        return int(headers['Content-Length'])
+    except (KeyError, ValueError):
+        return None
+
+def parse_retry_after(headers):
+    """
+    Reads a Retry-After header given in seconds.
+
+    Returns:
+        float or None: The number of seconds to wait, or None if the header is
+                       missing or uses the HTTP-date form.
+    """
+    try:
+        return max(0.0, float(headers['Retry-After']))
+    except (KeyError, ValueError):
+        return None
+
+def raise_for_retryable_status(response):
+    """Closes the response and raises RetryableStatusError on a 429 or 5xx status."""
+    if response.status_code in RETRY_STATUS_CODES:
+        response.close()
+        raise RetryableStatusError(
+            f"{response.status_code} {response.reason} for url: {response.url}",
+            response=response, retry_after=parse_retry_after(response.headers))
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Computes how long to wait before a retry.
+
+    Args:
+        attempt (int): The number of the retry, starting at 1.
+        retry_after (float, optional): A delay requested by the server.
+
+    Returns:
+        float: A random delay between 0 and the exponential backoff cap
+               ("full jitter"), but never shorter than `retry_after`.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX_SECONDS))
+    return delay
+
+def send_with_retries(send, url, max_retries=DEFAULT_MAX_RETRIES):
+    """
+    Sends a request, retrying transient errors and 429/5xx responses.
+
+    Args:
+        send (callable): Sends the request and returns the response.
+        url (str): The URL being requested, for the log messages.
+        max_retries (int): How many times to retry before giving up.
+
+    Returns:
+        requests.Response: The first response that isn't retryable.
+    """
+    attempt = 0
+    while True:
+        try:
+            response = send()
+            raise_for_retryable_status(response)
+            return response
+        except TRANSIENT_ERRORS as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            delay = backoff_delay(attempt, getattr(e, 'retry_after', None))
+            print(f"↻ Retrying {url} in {delay:.1f}s ({attempt}/{max_retries}): {e}")
+            time.sleep(delay)
+
+def url_key(url):
+    """Returns a short name for a URL that is the same in every run and thread."""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+
+def partial_path_for(filepath, url):
+    """
+    Returns the path of the partial download of `url` into `filepath`.
+    The name is stable across runs, so an interrupted download can be resumed.
+    """
+    directory, filename = os.path.split(filepath)
+    return os.path.join(directory, f".{filename}.{url_key(url)}.part")
+
+def stream_to_file(response, filepath, max_bytes=MAX_FILE_SIZE_BYTES, chunk_size=CHUNK_SIZE,
+                   hasher=None, chunks=None, partial_path=None, resume=False):
+    """
+    Streams a response body to disk in fixed-size chunks.
+
+    The body is written to a temporary file next to `filepath` and only renamed
+    into place once it has been downloaded completely, so a failed or aborted
+    download never leaves a truncated image behind. Memory use stays at one
+    chunk regardless of the image size.
+
+    Args:
+        response (requests.Response): A response opened with stream=True.
+        filepath (str): The final path of the file.
+        max_bytes (int): Abort once more than this many bytes have been received.
+        chunk_size (int): The number of bytes read and written per chunk.
+        hasher (hashlib hash object, optional): Updated with every chunk, so the
+                           content hash is available without re-reading the file.
+        chunks (iterator, optional): The body chunks to write, for callers that
+                           already started reading `response.iter_content()`.
+        partial_path (str, optional): A fixed path for the partial download.
+                           Unlike the default throwaway temp file, it is kept
+                           when the download is interrupted so it can be resumed.
+        resume (bool): Append to the existing `partial_path` (the response is
+                           the rest of the body, e.g. a 206 Partial Content).
+
+    Returns:
+        int: The size of the finished file in bytes.
+
+    Raises:
+        FileTooLargeError: If the body is larger than `max_bytes`.
+    """
+    if partial_path is None:
+        directory, filename = os.path.split(filepath)
+        # A unique hidden name in the same directory, so the final rename is atomic
+        temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.part")
+        mode = 'xb'
+    else:
+        temp_path = partial_path
+        mode = 'ab' if resume else 'wb'
+
+    bytes_written = 0
+    if resume:
+        bytes_written = os.path.getsize(temp_path)
+        # The hash must cover the bytes downloaded before the interruption too
+        if hasher is not None:
+            with open(temp_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    hasher.update(chunk)
+    try:
+        with open(temp_path, mode) as f:
+            if chunks is None:
+                chunks = response.iter_content(chunk_size=chunk_size)
+            for chunk in chunks:
+                bytes_written += len(chunk)
+                # Don't trust Content-Length: count what the server really sends
+                if bytes_written > max_bytes:
+                    raise FileTooLargeError(
+                        f"download exceeded the size limit of {max_bytes} bytes")
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+        os.replace(temp_path, filepath)
+    except FileTooLargeError:
+        os.remove(temp_path)
+        raise
+    except BaseException:
+        # Keep a resumable partial download; throw away a temp file
+        if partial_path is None:
+            os.remove(temp_path)
+        raise
+    return bytes_written
+
+def download_image(http, url, headers, filepath, max_retries=DEFAULT_MAX_RETRIES,
+                   response=None, chunks=None):
+    """
+    Downloads an image body to `filepath`, retrying transient errors.
+
+    If the connection drops mid-download, the bytes received so far are kept
+    in a partial file and the next attempt asks only for the rest with a
+    Range request. If-Range makes the server send the whole image again if it
+    changed in between. A partial file left behind by an interrupted run is
+    resumed the same way. If the server can't satisfy the range (416, e.g.
+    the partial file is already complete or the image has shrunk), the
+    partial file is thrown away and the whole image is requested.
+
+    Args:
+        http (requests.Session or module): Sends the requests.
+        url (str): The URL of the image.
+        headers (dict): The base request headers.
+        filepath (str): The final path of the image.
+        max_retries (int): How many times to retry before giving up.
+        response (requests.Response, optional): An already opened streamed GET
+                           for the image, used for the first attempt.
+        chunks (iterator, optional): Its body chunks, if reading has started.
+
+    Returns:
+        tuple: The SHA-256 hasher of the content and the response headers.
+    """
+    partial_path = partial_path_for(filepath, url)
+    validator_path = partial_path + ".validator"
+    attempt = 0
+    while True:
+        try:
+            range_requested = False
+            if response is None:
+                request_headers = dict(headers)
+                # Ask only for the missing bytes of an earlier partial download
+                if os.path.exists(partial_path) and os.path.exists(validator_path):
+                    with open(validator_path, 'r', encoding='utf-8') as f:
+                        request_headers['If-Range'] = f.read()
+                    request_headers['Range'] = f"bytes={os.path.getsize(partial_path)}-"
+                    range_requested = True
+                response = http.get(url, headers=request_headers, timeout=10, stream=True)
+
+            with response:
+                raise_for_retryable_status(response)
+                if response.status_code == 416 and range_requested:
+                    # The partial file can't be resumed: start over right away,
+                    # without a Range, instead of asking for it again forever
+                    os.remove(partial_path)
+                    os.remove(validator_path)
+                    response = None
+                    chunks = None
+                    continue
+                response.raise_for_status()
+                resume = response.status_code == 206
+                if resume:
+                    expected = f"bytes {os.path.getsize(partial_path)}-"
+                    if not response.headers.get('Content-Range', '').startswith(expected):
+                        # Not the range we asked for: start over on the next attempt
+                        os.remove(partial_path)
+                        raise requests.exceptions.ConnectionError(
+                            f"unexpected Content-Range for url: {url}")
+                else:
+                    # Remember which version the partial file belongs to.
+                    # Only a strong ETag or a Last-Modified date can be used in If-Range.
+                    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                    if validator and not validator.startswith('W/'):
+                        with open(validator_path, 'w', encoding='utf-8') as f:
+                            f.write(validator)
+                    elif os.path.exists(validator_path):
+                        os.remove(validator_path)
+
+                hasher = hashlib.sha256()
+                stream_to_file(response, filepath, hasher=hasher, chunks=chunks,
+                               partial_path=partial_path, resume=resume)
+            if os.path.exists(validator_path):
+                os.remove(validator_path)
+            return hasher, response.headers
+
+        except FileTooLargeError:
+            if os.path.exists(validator_path):
+                os.remove(validator_path)
+            raise
+        except TRANSIENT_ERRORS as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            delay = backoff_delay(attempt, getattr(e, 'retry_after', None))
+            print(f"↻ Retrying {url} in {delay:.1f}s ({attempt}/{max_retries}): {e}")
+            time.sleep(delay)
+            response = None
+            chunks = None
+
+
+class FetchIndex:
+    """
+    A persistent on-disk index of fetched images, stored in SQLite.
+
+    It is keyed both by URL (so a re-run can skip a URL without touching the
+    network) and by the SHA-256 of the content (so identical bytes fetched
+    from different URLs are stored only once). It also caches the ETag and
+    Last-Modified validators of each URL for conditional re-fetching.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) the index database.
+
+        Args:
+            path (str): The path of the SQLite database file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL,"
+                " filepath TEXT NOT NULL, fetched_at REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS contents ("
+                " sha256 TEXT PRIMARY KEY, filepath TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS validators ("
+                " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+                " checked_at REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS validators_checked_at"
+                " ON validators (checked_at)")
+
+    @classmethod
+    def for_directory(cls, output_dir=OUTPUT_DIR):
+        """Opens the index that lives inside an output directory."""
+        return cls(os.path.join(output_dir, INDEX_FILENAME))
+
+    def lookup_url(self, url):
+        """
+        Returns the (sha256, filepath) recorded for a URL, or None if the URL
+        has never been saved.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT sha256, filepath FROM urls WHERE url = ?", (url,)).fetchone()
+
+    def record(self, url, sha256, filepath):
+        """
+        Records that `url` was saved to `filepath` with the given content hash.
+
+        Returns:
+            str: The path the content was first stored under. If it differs
+                 from `filepath`, the same bytes already exist on disk.
+        """
+        with self._lock, self._conn:
+            # If the URL's content changed, its file no longer holds the old bytes
+            self._conn.execute(
+                "DELETE FROM contents WHERE filepath = ? AND sha256 != ?", (filepath, sha256))
+            row = self._conn.execute(
+                "SELECT filepath FROM contents WHERE sha256 = ?", (sha256,)).fetchone()
+            # Re-point the content at the new file if the old copy was deleted
+            if row is None or not os.path.exists(row[0]):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO contents (sha256, filepath) VALUES (?, ?)",
+                    (sha256, filepath))
+                stored_path = filepath
+            else:
+                stored_path = row[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, filepath, fetched_at)"
+                " VALUES (?, ?, ?, ?)", (url, sha256, filepath, time.time()))
+            return stored_path
+
+    def get_validators(self, url):
+        """
+        Returns the cached (etag, last_modified) pair for a URL, or None.
+        Either value may be None if the server did not send it.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified FROM validators WHERE url = ?", (url,)).fetchone()
+
+    def save_validators(self, url, etag, last_modified):
+        """
+        Caches the validators of a response. A response without either
+        header removes any cached entry, since it can't be revalidated.
+        """
+        with self._lock, self._conn:
+            if etag is None and last_modified is None:
+                self._conn.execute("DELETE FROM validators WHERE url = ?", (url,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO validators (url, etag, last_modified, checked_at)"
+                    " VALUES (?, ?, ?, ?)", (url, etag, last_modified, time.time()))
+
+    def evict_validators(self, max_entries=DEFAULT_VALIDATOR_MAX_ENTRIES,
+                         max_age_days=DEFAULT_VALIDATOR_MAX_AGE_DAYS):
+        """
+        Applies the eviction policy to the validator cache: entries not checked
+        for `max_age_days` are dropped, then the least recently checked entries
+        are dropped until at most `max_entries` remain. An evicted URL is
+        simply fetched in full the next time it is refreshed.
+
+        Args:
+            max_entries (int or None): The maximum number of cached entries.
+            max_age_days (float or None): The maximum age of an entry in days.
+
+        Returns:
+            int: The number of entries evicted.
+        """
+        evicted = 0
+        with self._lock, self._conn:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 24 * 60 * 60
+                evicted += self._conn.execute(
+                    "DELETE FROM validators WHERE checked_at < ?", (cutoff,)).rowcount
+            if max_entries is not None:
+                evicted += self._conn.execute(
+                    "DELETE FROM validators WHERE url IN ("
+                    " SELECT url FROM validators ORDER BY checked_at DESC"
+                    " LIMIT -1 OFFSET ?)", (max_entries,)).rowcount
+        return evicted
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def link_to_existing(existing_path, filepath):
+    """
+    Replaces `filepath` with a hard link to `existing_path`, so both names
+    share one copy of the bytes on disk.
+
+    Returns:
+        bool: True if the link was made, False if the filesystem does not
+              support it (the separate copy is then kept).
+    """
+    if os.path.samefile(existing_path, filepath):
+        return True
+    directory, filename = os.path.split(filepath)
+    temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.link")
+    try:
+        os.link(existing_path, temp_path)
+    except OSError:
+        return False
+    os.replace(temp_path, filepath)
+    return True
+
+def fetch_and_save_image(url, fetched_urls, session=None, output_dir=OUTPUT_DIR, index=None,
+                         refresh=False, single_request=False, max_retries=DEFAULT_MAX_RETRIES):
     """
     Fetches and saves an image from a URL, with safety and deduplication checks.
 
@@ -16,96 +535,499 @@ def fetch_and_save_image(url, fetched_urls):
         url (str): The URL of the image to fetch.
         fetched_urls (set): A set of URLs that have already been processed
                            to prevent duplicate downloads.
+        session (requests.Session, optional): A session to send requests with so
+                           connections are kept alive and reused. Defaults to
+                           the module-level `requests` functions.
+        output_dir (str): The directory the image is saved into.
+        index (FetchIndex, optional): A persistent index used to skip URLs saved
+                           by earlier runs and to store identical content once.
+        refresh (bool): Re-check URLs already in the index instead of skipping
+                           them. Cached ETag/Last-Modified validators are sent
+                           so an unchanged image costs no body transfer.
+        single_request (bool): Skip the HEAD request and run the checks on the
+                           headers and first bytes of a single streamed GET,
+                           closing the connection early if a check fails.
+        max_retries (int): How many times to retry connection errors, timeouts
+                           and 429/5xx responses, with exponential backoff.
+                           Interrupted downloads are resumed with Range requests.
+
+    Returns:
+        str: One of STATUS_FETCHED, STATUS_SKIPPED, STATUS_UNCHANGED,
+             STATUS_REJECTED or STATUS_FAILED.
     """
     # 1. Deduplication Check
     if url in fetched_urls:
         print(f"✓ Skipping URL: {url} - Already fetched.")
-        return
+        return STATUS_SKIPPED
+
+    # Check the persistent index too, so a re-run skips the URL without
+    # making any request at all
+    known_filepath = None
+    validators = None
+    if index is not None:
+        entry = index.lookup_url(url)
+        if entry is not None and os.path.exists(entry[1]):
+            if not refresh:
+                print(f"✓ Skipping URL: {url} - Already saved to {entry[1]}.")
+                fetched_urls.add(url)
+                return STATUS_SKIPPED
+            known_filepath = entry[1]
+            validators = index.get_validators(url)
+
+    # Reuse the caller's connection pool when one is given
+    http = session if session is not None else requests
 
     try:
         # 2. Add HTTP headers for responsible fetching
         headers = {'User-Agent': USER_AGENT}
-        
-        # 3. Check important HTTP headers before downloading the content
-        # Use a HEAD request to get headers without downloading the full content
-        response = requests.head(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        # Check content type and length
-        content_type = response.headers.get('Content-Type', '')
-        content_length_bytes = int(response.headers.get('Content-Length', 0))
-        
+        # When refreshing, make the first request conditional so an unchanged
+        # image stops there
+        first_request_headers = dict(headers)
+        if validators is not None:
+            etag, last_modified = validators
+            if etag:
+                first_request_headers['If-None-Match'] = etag
+            if last_modified:
+                first_request_headers['If-Modified-Since'] = last_modified
+
         # Get filename and extension
         parsed_url = urlparse(url)
         filename = os.path.basename(parsed_url.path)
         if '.' not in filename: # If no extension in filename
-             filename = f"downloaded_image_{len(fetched_urls)}.jpeg"
-        
-        # 4. Implement precautions for unknown sources
-        # Check if the content is actually an image and within size limits
-        if not any(ext in content_type for ext in SUPPORTED_EXTENSIONS):
-            print(f"✗ Error: URL {url} is not a supported image type ({content_type}).")
-            return
-        
-        if content_length_bytes > MAX_FILE_SIZE_MB * 1024 * 1024:
-            print(f"✗ Error: File size exceeds the {MAX_FILE_SIZE_MB}MB limit.")
-            return
-
-        # 5. Fetch the image content now that pre-checks have passed
-        print(f"Fetching {url}...")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+             # Named after the URL, not a counter, so concurrent fetches
+             # can't pick the same name
+             filename = f"downloaded_image_{url_key(url)}.jpeg"
 
         # Create directory if it doesn't exist
-        os.makedirs("Fetched_Images", exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         
-        filepath = os.path.join("Fetched_Images", filename)
+        filepath = os.path.join(output_dir, filename)
         
-        # Use a more robust check to avoid file name collisions
-        # In a more advanced version, you might check a hash of the content
-        # instead of just the filename to catch images with different names.
-        if os.path.exists(filepath):
+        # Avoid file name collisions. Images with different names but the
+        # same content are caught by the content hash in the index below.
+        # When refreshing, the URL's own file is expected to exist and is replaced.
+        if os.path.exists(filepath) and filepath != known_filepath:
             print(f"✓ Skipping file: {filename} - A file with this name already exists.")
             fetched_urls.add(url) # Add to set to prevent re-checking
-            return
+            return STATUS_SKIPPED
+
+        # 3. Check important HTTP headers before downloading the content.
+        # By default a HEAD request gets the headers without the content; in
+        # single-request mode the GET is opened as a stream and its body is
+        # only read once the headers have passed.
+        if single_request:
+            response = send_with_retries(
+                lambda: http.get(url, headers=first_request_headers, timeout=10, stream=True),
+                url, max_retries)
+        else:
+            response = send_with_retries(
+                lambda: http.head(url, headers=first_request_headers, timeout=10),
+                url, max_retries)
+
+        # Leaving this block closes the response; a streamed GET that failed
+        # a check is closed before its body is downloaded
+        with response:
+            if response.status_code == 304:
+                # Only a conditional request, sent when refreshing an indexed
+                # URL, can be answered with 304
+                if validators is None:
+                    print(f"✗ Error: Unexpected 304 Not Modified for {url}.")
+                    return STATUS_FAILED
+                # A 304 may carry updated validators; otherwise keep the cached ones
+                index.save_validators(url, response.headers.get('ETag', validators[0]),
+                                      response.headers.get('Last-Modified', validators[1]))
+                print(f"✓ Not modified: {url} - Keeping {known_filepath}.")
+                fetched_urls.add(url)
+                return STATUS_UNCHANGED
+            response.raise_for_status()
+
+            # Check content type and length
+            content_type = response.headers.get('Content-Type', '')
+            content_length_bytes = parse_content_length(response.headers)
+
+            # 4. Implement precautions for unknown sources
+            # Check if the content is actually an image and within size limits.
+            # In single-request mode a generic or missing Content-Type is
+            # allowed, because the magic bytes are checked below.
+            generic_type = single_request and is_generic_content_type(content_type)
+            if not generic_type and not is_supported_content_type(content_type):
+                print(f"✗ Error: URL {url} is not a supported image type ({content_type}).")
+                return STATUS_REJECTED
+
+            # A missing Content-Length is allowed here; the streamed download
+            # below enforces the limit on the bytes actually received
+            if content_length_bytes is not None and content_length_bytes > MAX_FILE_SIZE_BYTES:
+                print(f"✗ Error: File size exceeds the {MAX_FILE_SIZE_MB}MB limit.")
+                return STATUS_REJECTED
 
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+            if single_request:
+                # Sniff the first bytes so only real images are written
+                chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+                head = b""
+                for chunk in chunks:
+                    head += chunk
+                    if len(head) >= MAGIC_BYTES_LENGTH:
+                        break
+                if sniff_image_type(head) is None:
+                    print(f"✗ Error: URL {url} does not contain a supported image format.")
+                    return STATUS_REJECTED
+
+                print(f"Fetching {url}...")
+                hasher, validator_headers = download_image(
+                    http, url, headers, filepath, max_retries,
+                    response=response, chunks=itertools.chain([head], chunks))
+
+        # 5. Fetch the image content now that pre-checks have passed,
+        # streaming it to disk chunk by chunk instead of buffering it in memory
+        if not single_request:
+            print(f"Fetching {url}...")
+            hasher, validator_headers = download_image(http, url, headers, filepath, max_retries)
             
         print(f"✓ Successfully fetched: {filename}")
         print(f"✓ Image saved to {filepath}")
+
+        # 6. Content-addressed deduplication: identical bytes are kept once
+        if index is not None:
+            index.save_validators(url, validator_headers.get('ETag'),
+                                  validator_headers.get('Last-Modified'))
+            stored_path = index.record(url, hasher.hexdigest(), filepath)
+            if stored_path != filepath and link_to_existing(stored_path, filepath):
+                print(f"✓ Same content as {stored_path} - stored once (hard link).")
         fetched_urls.add(url)
+        return STATUS_FETCHED
         
+    except FileTooLargeError as e:
+        print(f"✗ Error: {url} {e}.")
+        return STATUS_REJECTED
     except requests.exceptions.RequestException as e:
         print(f"✗ Connection error for {url}: {e}")
     except Exception as e:
         print(f"✗ An unexpected error occurred for {url}: {e}")
+    return STATUS_FAILED
 
-def main():
+
+class HostSessionPool:
+    """
+    Hands out one shared keep-alive requests.Session per host, with a
+    connection pool sized for `per_host_limit` concurrent requests.
+    """
+
+    def __init__(self, per_host_limit=DEFAULT_PER_HOST_LIMIT):
+        """
+        Args:
+            per_host_limit (int): The maximum number of concurrent requests
+                                  (and pooled connections) per host.
+        """
+        self.per_host_limit = per_host_limit
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, host):
+        """Returns the session for a host, creating it on first use."""
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                # Size the connection pool to match the host's concurrency limit
+                adapter = HTTPAdapter(pool_connections=1,
+                                          pool_maxsize=self.per_host_limit)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return self._sessions[host]
+
+    def close(self):
+        """Closes every pooled session."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def fetch_images_concurrently(urls, max_workers=DEFAULT_MAX_WORKERS,
+                              per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                              output_dir=OUTPUT_DIR, fetched_urls=None, index=None,
+                              refresh=False, single_request=False,
+                              max_retries=DEFAULT_MAX_RETRIES, checkpoint=None):
+    """
+    Fetches many image URLs at once using a bounded pool of worker threads.
+
+    Each host gets one shared keep-alive session, and no more than
+    `per_host_limit` requests run against the same host at the same time.
+    URLs wait in a queue per host and are only handed to the thread pool when
+    their host has a free slot, so a long list for one host can't occupy
+    every worker while other hosts wait.
+    With a checkpoint, URLs finished by an interrupted earlier run are left
+    out, so a restarted batch continues where it stopped.
+
+    Args:
+        urls (list): The image URLs to fetch. Duplicates are only fetched once.
+        max_workers (int): The size of the worker thread pool.
+        per_host_limit (int): The maximum number of concurrent requests per host.
+        output_dir (str): The directory images are saved into.
+        fetched_urls (set, optional): URLs already processed by an earlier call.
+        index (FetchIndex, optional): A persistent fetch index shared by all workers.
+        refresh (bool): Revalidate indexed URLs with conditional requests.
+        single_request (bool): Validate each image on one streamed GET, without a HEAD.
+        max_retries (int): How many times to retry each transient failure.
+        checkpoint (BatchCheckpoint, optional): Records finished URLs as they complete.
+
+    Returns:
+        dict: A summary report with per-status counts, per-host counts,
+              the elapsed time and the throughput in URLs per second.
+    """
+    if fetched_urls is None:
+        fetched_urls = set()
+
+    # Drop duplicates up front (keeping the original order) so two workers
+    # never race on the same URL
+    unique_urls = list(dict.fromkeys(urls))
+    checkpointed = 0
+    if checkpoint is not None:
+        pending_urls = checkpoint.pending(unique_urls)
+        checkpointed = len(unique_urls) - len(pending_urls)
+        unique_urls = pending_urls
+
+    pool = HostSessionPool(per_host_limit)
+    results = {}
+
+    # One queue of pending URLs per host
+    host_queues = {}
+    for url in unique_urls:
+        host_queues.setdefault(urlparse(url).netloc, deque()).append(url)
+
+    def worker(url, host):
+        status = fetch_and_save_image(url, fetched_urls, session=pool.get(host),
+                                      output_dir=output_dir, index=index,
+                                      refresh=refresh, single_request=single_request,
+                                      max_retries=max_retries)
+        # Failed URLs stay pending so a restarted run tries them again
+        if checkpoint is not None and status != STATUS_FAILED:
+            checkpoint.mark_done(url)
+        return url, host, status
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = set()
+
+            def submit_next(host):
+                queue = host_queues[host]
+                if queue:
+                    running.add(executor.submit(worker, queue.popleft(), host))
+
+            for host in host_queues:
+                for _ in range(per_host_limit):
+                    submit_next(host)
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, host, status = future.result()
+                    results[url] = (host, status)
+                    # The host has a free slot again
+                    submit_next(host)
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'total': len(unique_urls),
+        'duplicates': len(urls) - len(unique_urls) - checkpointed,
+        'checkpointed': checkpointed,
+        STATUS_FETCHED: 0,
+        STATUS_SKIPPED: 0,
+        STATUS_UNCHANGED: 0,
+        STATUS_REJECTED: 0,
+        STATUS_FAILED: 0,
+        'hosts': {},
+        'failed_urls': [],
+        'elapsed_seconds': elapsed,
+        'urls_per_second': len(unique_urls) / elapsed if elapsed > 0 else 0.0,
+    }
+    for url in unique_urls:
+        host, status = results[url]
+        summary[status] += 1
+        host_counts = summary['hosts'].setdefault(host, {})
+        host_counts[status] = host_counts.get(status, 0) + 1
+        if status == STATUS_FAILED:
+            summary['failed_urls'].append(url)
+    return summary
+
+
+def print_summary_report(summary):
+    """
+    Prints the report returned by fetch_images_concurrently.
+
+    Args:
+        summary (dict): The summary report to print.
+    """
+    print("\n--- Batch Summary ---")
+    print(f"URLs processed: {summary['total']} ({summary['duplicates']} duplicates dropped)")
+    if summary['checkpointed']:
+        print(f"✓ Already done in an earlier run: {summary['checkpointed']}")
+    print(f"✓ Fetched:  {summary[STATUS_FETCHED]}")
+    print(f"✓ Skipped:  {summary[STATUS_SKIPPED]}")
+    print(f"✓ Unchanged: {summary[STATUS_UNCHANGED]}")
+    print(f"✗ Rejected: {summary[STATUS_REJECTED]}")
+    print(f"✗ Failed:   {summary[STATUS_FAILED]}")
+    print(f"Elapsed: {summary['elapsed_seconds']:.2f}s "
+          f"({summary['urls_per_second']:.1f} URLs/s)")
+    for host, counts in sorted(summary['hosts'].items()):
+        details = ", ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+        print(f"  {host}: {details}")
+    for url in summary['failed_urls']:
+        print(f"  ✗ {url}")
+
+class BatchCheckpoint:
+    """
+    An append-only log of the URLs a batch has finished, so a restarted run
+    only works on the URLs that are still pending. Marking a URL costs one
+    short appended line, whatever the size of the batch.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the checkpoint file, loading any URLs finished by earlier runs.
+
+        Args:
+            path (str): The path of the checkpoint file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                # A run killed mid-write can leave a torn last line; it won't
+                # match any URL and is simply ignored
+                self._done.update(line.rstrip('\n') for line in f)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def pending(self, urls):
+        """Returns the URLs (in order) that have not been finished yet."""
+        return [url for url in urls if url not in self._done]
+
+    def mark_done(self, url):
+        """Records that a URL is finished. The line is flushed straight away."""
+        with self._lock:
+            self._done.add(url)
+            self._file.write(url + '\n')
+            self._file.flush()
+
+    def clear(self):
+        """Deletes the checkpoint once the whole batch has finished."""
+        with self._lock:
+            self._file.close()
+            os.remove(self.path)
+
+    def close(self):
+        """Closes the checkpoint file, keeping it for the next run."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+def read_url_file(path):
+    """
+    Reads image URLs from a text file, one per line.
+    Blank lines and lines starting with '#' are ignored.
+
+    Args:
+        path (str): The path of the URL list file.
+    """
+    with open(path, 'r', encoding='utf-8') as url_file:
+        return [line.strip() for line in url_file
+                if line.strip() and not line.strip().startswith('#')]
+
+def parse_args(argv=None):
+    """Parses the command-line options of the fetcher."""
+    parser = argparse.ArgumentParser(description="Ubuntu Image Fetcher")
+    parser.add_argument("--batch", metavar="URL_FILE",
+                        help="fetch every URL listed in URL_FILE concurrently")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="number of worker threads in batch mode")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST_LIMIT,
+                        help="maximum concurrent requests per host in batch mode")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help="directory to save images into")
+    parser.add_argument("--no-index", action="store_true",
+                        help="don't use the persistent fetch index in the output directory")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-check indexed URLs with conditional requests instead of skipping them")
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_VALIDATOR_MAX_ENTRIES,
+                        help="maximum number of cached ETag/Last-Modified entries")
+    parser.add_argument("--cache-max-age-days", type=float, default=DEFAULT_VALIDATOR_MAX_AGE_DAYS,
+                        help="drop cached validators not checked for this many days")
+    parser.add_argument("--single-request", action="store_true",
+                        help="skip the HEAD request and validate each image on a single streamed GET")
+    parser.add_argument("--retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="retries per request for connection errors and 429/5xx responses")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="in batch mode, record finished URLs in FILE and skip them when restarted")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Main function to run the Ubuntu Image Fetcher.
-    Prompts the user for multiple URLs and processes them.
+    Prompts the user for multiple URLs and processes them, or fetches a
+    whole URL list concurrently when --batch is given.
     """
+    args = parse_args(argv)
+
     print("Welcome to the Ubuntu Image Fetcher")
     print("A tool for mindfully collecting images from the web\n")
-    print("Enter image URLs one by one. Type 'done' to finish.\n")
-    
-    urls_to_fetch = []
-    while True:
-        url = input("Please enter an image URL: ")
-        if url.lower() == 'done':
-            break
-        urls_to_fetch.append(url)
-        
-    if not urls_to_fetch:
-        print("No URLs entered. Exiting.")
-        sys.exit()
-
-    # Use a set to track fetched URLs for efficient lookups
-    fetched_urls = set()
-    
-    for url in urls_to_fetch:
-        fetch_and_save_image(url, fetched_urls)
+
+    if args.batch:
+        try:
+            urls_to_fetch = read_url_file(args.batch)
+        except OSError as e:
+            print(f"✗ Could not read URL file {args.batch}: {e}")
+            sys.exit(1)
+        if not urls_to_fetch:
+            print("No URLs found in the file. Exiting.")
+            sys.exit()
+    else:
+        print("Enter image URLs one by one. Type 'done' to finish.\n")
+
+        urls_to_fetch = []
+        while True:
+            url = input("Please enter an image URL: ")
+            if url.lower() == 'done':
+                break
+            urls_to_fetch.append(url)
+
+        if not urls_to_fetch:
+            print("No URLs entered. Exiting.")
+            sys.exit()
+
+    # The persistent index remembers what earlier runs already saved
+    index = None if args.no_index else FetchIndex.for_directory(args.output_dir)
+    checkpoint = BatchCheckpoint(args.checkpoint) if args.batch and args.checkpoint else None
+    try:
+        if args.batch:
+            summary = fetch_images_concurrently(urls_to_fetch, max_workers=args.workers,
+                                                per_host_limit=args.per_host,
+                                                output_dir=args.output_dir, index=index,
+                                                refresh=args.refresh,
+                                                single_request=args.single_request,
+                                                max_retries=args.retries,
+                                                checkpoint=checkpoint)
+            print_summary_report(summary)
+            # Nothing left to resume once every URL has finished
+            if checkpoint is not None and not summary[STATUS_FAILED]:
+                checkpoint.clear()
+        else:
+            # Use a set to track fetched URLs for efficient lookups
+            fetched_urls = set()
+
+            for url in urls_to_fetch:
+                fetch_and_save_image(url, fetched_urls, output_dir=args.output_dir,
+                                     index=index, refresh=args.refresh,
+                                     single_request=args.single_request,
+                                     max_retries=args.retries)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if index is not None:
+            index.evict_validators(args.cache_max_entries, args.cache_max_age_days)
+            index.close()
 
     print("\nConnection strengthened. Community enriched.")
 